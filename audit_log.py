@@ -0,0 +1,192 @@
+"""Dziennik obliczeń BD (audyt jakości) zapisywany asynchronicznie.
+
+Każde obliczenie zapisuje wejścia, wersję modeli (BDModel.fingerprint), wynik i detal.
+Ścieżka obliczeń tylko dokłada krotkę argumentów do bufora pierścieniowego (deque) –
+tablice nie są kopiowane, więc wywołujący nie może ich modyfikować po record (wszystkie
+obecne wywołania przekazują tablice tworzone na potrzeby jednego obliczenia; bufor używany
+ponownie należy skopiować przed przekazaniem). Wątek w tle co FLUSH_INTERVAL sekund opróżnia bufor, zamienia wpisy na zwarte
+wiersze JSON (jeden wiersz na wywołanie, tablice jako listy) i zapisuje je paczką do
+rotowanego pliku audit/bd_audit.jsonl. Wyłączenie: LMDB_AUDIT=0.
+
+Zestawienie:
+    python audit_log.py --by part
+    python audit_log.py --by die --since 2026-01-01 --part wspornik.dxf
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+logger = logging.getLogger(__name__)
+
+AUDIT_FILE = os.path.join("audit", "bd_audit.jsonl")
+BUFFER_CAPACITY = 100000  # Wpisy ponad pojemność zastępują najstarsze (licznik dropped)
+FLUSH_INTERVAL = 1.0
+MAX_BYTES = 20 * 1024 * 1024
+BACKUP_COUNT = 10
+BD_DECIMALS = 4
+
+
+def _plain(value):
+    """Zamienia tablice numpy/pandas i skalary numpy na typy JSON."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return list(value)
+
+
+class AuditLog:
+    """Bufor pierścieniowy wpisów i wątek zapisujący je w paczkach."""
+
+    def __init__(self, file_path=AUDIT_FILE, capacity=BUFFER_CAPACITY, flush_interval=FLUSH_INTERVAL):
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self.enabled = os.getenv("LMDB_AUDIT", "1") != "0"
+        self.dropped = 0
+        self.written = 0
+        self._buffer = deque(maxlen=capacity)
+        self._thread = None
+        self._state_lock = threading.Lock()  # Start wątku i licznik dropped
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer = None
+
+    def record(self, source, fingerprint, part, material, grubosc, V, kat, dlugosc, bd):
+        """Dodaje wpis do bufora; argumenty mogą być skalarami lub tablicami (bez kopiowania)."""
+        if not self.enabled:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            with self._state_lock:
+                self.dropped += 1
+        self._buffer.append((time.time(), source, fingerprint, part, material, grubosc, V, kat, dlugosc, bd))
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._state_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="bd-audit-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Błąd zapisu dziennika obliczeń BD")
+
+    def _get_writer(self):
+        if self._writer is None:
+            writer = logging.getLogger("lmdb.bd_audit")
+            writer.propagate = False
+            writer.setLevel(logging.INFO)
+            if not writer.handlers:
+                os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+                handler = RotatingFileHandler(self.file_path, maxBytes=MAX_BYTES,
+                                              backupCount=BACKUP_COUNT, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                writer.addHandler(handler)
+            self._writer = writer
+        return self._writer
+
+    def flush(self):
+        """Zapisuje wszystkie wpisy z bufora jedną paczką."""
+        with self._write_lock:
+            lines = []
+            while True:
+                try:
+                    ts, source, fingerprint, part, material, grubosc, V, kat, dlugosc, bd = self._buffer.popleft()
+                except IndexError:
+                    break
+                bd = _plain(bd)
+                bd = round(bd, BD_DECIMALS) if isinstance(bd, float) else [round(x, BD_DECIMALS) for x in bd]
+                lines.append(json.dumps({
+                    "ts": round(ts, 3), "src": source, "fp": fingerprint, "part": _plain(part),
+                    "mat": _plain(material), "t": _plain(grubosc), "V": _plain(V), "kat": _plain(kat),
+                    "len": _plain(dlugosc), "bd": bd,
+                }, separators=(",", ":"), ensure_ascii=False))
+            if lines:
+                self._get_writer().info("\n".join(lines))
+                self.written += len(lines)
+
+
+audit = AuditLog()
+
+
+##############################
+# Zestawienia
+##############################
+def audit_files(file_path=AUDIT_FILE):
+    """Pliki dziennika od najstarszego (kopie rotacji .N ... .1, plik bieżący)."""
+    backups = [f"{file_path}.{i}" for i in range(BACKUP_COUNT, 0, -1)]
+    return [path for path in backups + [file_path] if os.path.exists(path)]
+
+
+def iter_rows(file_path=AUDIT_FILE, since=None):
+    """Rozwija wpisy dziennika do pojedynczych gięć (skalary są powielane na długość wpisu)."""
+    for path in audit_files(file_path):
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if since is not None and entry["ts"] < since:
+                    continue
+                columns = {key: entry.get(key) for key in ("part", "mat", "t", "V", "kat", "len", "bd")}
+                n = max((len(v) for v in columns.values() if isinstance(v, list)), default=1)
+                for i in range(n):
+                    row = {key: (value[i] if isinstance(value, list) else value) for key, value in columns.items()}
+                    row["ts"], row["fp"], row["src"] = entry["ts"], entry["fp"], entry["src"]
+                    yield row
+
+
+def aggregate(rows, by):
+    """Sumy BD i liczba gięć na detal ("part") lub matrycę ("die": V i grubość)."""
+    groups = {}
+    for row in rows:
+        if not row["kat"]:
+            continue
+        key = row["part"] if by == "part" else f"V{row['V']:g} / t{row['t']:g} / {row['mat']}"
+        group = groups.setdefault(key, {"bends": 0, "total_bd": 0.0, "fingerprints": set(), "last": 0.0})
+        group["bends"] += 1
+        group["total_bd"] += row["bd"]
+        group["fingerprints"].add(row["fp"])
+        group["last"] = max(group["last"], row["ts"])
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zestawienie dziennika obliczeń BD.")
+    parser.add_argument("--by", choices=("part", "die"), default="part")
+    parser.add_argument("--file", default=AUDIT_FILE)
+    parser.add_argument("--since", help="Data początkowa RRRR-MM-DD.")
+    parser.add_argument("--part", help="Tylko wpisy danego detalu.")
+    args = parser.parse_args()
+
+    since = time.mktime(time.strptime(args.since, "%Y-%m-%d")) if args.since else None
+    rows = iter_rows(args.file, since)
+    if args.part:
+        rows = (row for row in rows if row["part"] == args.part)
+    groups = aggregate(rows, args.by)
+
+    header = "Detal" if args.by == "part" else "Matryca"
+    print(f"{header:<40} {'Gięcia':>8} {'Suma BD':>12} {'Śr. BD':>10}  Modele / ostatnio")
+    for key, group in sorted(groups.items(), key=lambda item: str(item[0])):
+        last = time.strftime("%Y-%m-%d %H:%M", time.localtime(group["last"]))
+        print(f"{str(key):<40} {group['bends']:>8} {group['total_bd']:>12.2f} "
+              f"{group['total_bd'] / group['bends']:>10.3f}  {','.join(sorted(map(str, group['fingerprints'])))} / {last}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Rdzeń obliczeń BD niezależny od Qt.
+
+Zlecenie (job) jest opisane kolumnowo – jeden wiersz na segment:
+    part      – identyfikator detalu
+    material  – "CZ" lub "N"
+    grubosc   – grubość blachy [mm]
+    V         – szerokość matrycy [mm]
+    kat       – kąt gięcia [°] (0 oznacza brak gięcia, BD = 0)
+    dlugosc   – długość segmentu [mm]
+
+Identyczne warunki gięcia (materiał, grubość, V, kąt) są liczone raz dla całego zlecenia,
+a wyniki są rozpraszane z powrotem do segmentów i sumowane na detal.
+
+Przykład (CLI):
+    python bd_core.py zlecenie.csv --quantities ilosci.csv
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from audit_log import audit
+from instrumentation import stats
+
+
+PREDICTION_CACHE_SIZE = 200000
+
+
+class PredictionCache:
+    """BD dla warunków gięcia (materiał, grubość, V, kąt) policzone już przez bieżące modele.
+
+    Po zmianie modeli (inny fingerprint) zawartość jest odrzucana; po przekroczeniu
+    max_size usuwane są najdawniej używane warunki.
+    """
+
+    def __init__(self, max_size=PREDICTION_CACHE_SIZE):
+        self.max_size = max_size
+        self.fingerprint = None
+        self._values = OrderedDict()
+
+    def __len__(self):
+        return len(self._values)
+
+    def lookup(self, fingerprint, keys):
+        """Zwraca listę wartości (None dla brakujących kluczy)."""
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self._values = OrderedDict()
+        values = []
+        for key in keys:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.move_to_end(key)
+            values.append(value)
+        return values
+
+    def store(self, fingerprint, keys, values):
+        if fingerprint != self.fingerprint:
+            return
+        for key, value in zip(keys, values):
+            self._values[key] = value
+            self._values.move_to_end(key)
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+
+def predict_unique_conditions(model, material, grubosc, V, kat, cache=None):
+    """Zwraca BD dla każdego wiersza, licząc predykcję tylko raz na unikalny warunek gięcia.
+
+    cache – opcjonalny PredictionCache; predykcja jest wykonywana tylko dla brakujących warunków.
+    """
+    material = np.asarray(material)
+    grubosc = np.asarray(grubosc, dtype=float)
+    V = np.asarray(V, dtype=float)
+    kat = np.asarray(kat, dtype=float)
+    bd = np.zeros(len(kat))
+    bent = kat != 0
+    if not bent.any():
+        return bd, 0
+
+    materials, material_codes = np.unique(material[bent], return_inverse=True)
+    conditions = np.column_stack([material_codes, grubosc[bent], V[bent], kat[bent]])
+    unique, inverse = np.unique(conditions, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    bd_unique = np.zeros(len(unique))
+    missing = np.ones(len(unique), dtype=bool)
+    if cache is not None:
+        keys = [(str(materials[int(code)]), t, v, k) for code, t, v, k in unique.tolist()]
+        for i, value in enumerate(cache.lookup(model.fingerprint, keys)):
+            if value is not None:
+                bd_unique[i] = value
+                missing[i] = False
+        stats.incr("bd.cache_hits", int((~missing).sum()))
+    # Jeden wektorowy predict na materiał
+    for code, name in enumerate(materials):
+        mask = (unique[:, 0] == code) & missing
+        if mask.any():
+            bd_unique[mask] = model.oblicz_bd_batch(unique[mask, 1], unique[mask, 2], unique[mask, 3], name)
+    if cache is not None and missing.any():
+        cache.store(model.fingerprint, [keys[i] for i in np.flatnonzero(missing)], bd_unique[missing].tolist())
+    bd[bent] = bd_unique[inverse]
+    stats.observe("bd.unique_conditions", len(unique))
+    return bd, len(unique)
+
+
+def calculate_job(model, part, material, grubosc, V, kat, dlugosc, quantities=None, source="job", cache=None):
+    """Oblicza BD segmentów oraz sumy na detal dla całego zlecenia.
+
+    quantities – opcjonalny słownik {detal: ilość sztuk} do wyliczenia sum dla zlecenia.
+    source – etykieta źródła obliczenia w dzienniku audytu.
+    cache – opcjonalny PredictionCache współdzielony między obliczeniami.
+    Tablice wejściowe trafiają do dziennika audytu bez kopiowania – nie modyfikuj ich po wywołaniu.
+    Zwraca słownik tablic: "bd" na segment oraz "parts", "total_length", "total_bd",
+    "effective_length" na detal.
+    """
+    with stats.timer("bd.calculate_job"):
+        dlugosc = np.asarray(dlugosc, dtype=float)
+        bd, unique_count = predict_unique_conditions(model, material, grubosc, V, kat, cache)
+        audit.record(source, model.fingerprint, part, material, grubosc, V, kat, dlugosc, bd)
+        parts, part_index = np.unique(np.asarray(part), return_inverse=True)
+        part_index = part_index.reshape(-1)
+        n_parts = len(parts)
+        effective = np.maximum(dlugosc - bd, 0)
+        result = {
+            "bd": bd,
+            "parts": parts,
+            "total_length": np.bincount(part_index, weights=dlugosc, minlength=n_parts),
+            "total_bd": np.bincount(part_index, weights=bd, minlength=n_parts),
+            "effective_length": np.bincount(part_index, weights=effective, minlength=n_parts),
+            "unique_conditions": unique_count,
+        }
+        if quantities is not None:
+            qty = np.array([quantities.get(p, 1) for p in parts.tolist()], dtype=float)
+            result["quantity"] = qty
+            result["job_effective_length"] = float((result["effective_length"] * qty).sum())
+            result["job_total_bd"] = float((result["total_bd"] * qty).sum())
+        return result
+
+
+def calculate_part(model, grubosc, V, material, lengths, angles, part=None, source="part", cache=None):
+    """Oblicza BD i sumy dla jednego detalu o stałych parametrach gięcia."""
+    n = len(lengths)
+    if n == 0:
+        return {"bd": np.zeros(0), "total_length": 0.0, "total_bd": 0.0, "effective_length": 0.0}
+    result = calculate_job(
+        model,
+        np.full(n, "" if part is None else str(part)),
+        np.full(n, material),
+        np.full(n, float(grubosc)),
+        np.full(n, float(V)),
+        angles,
+        lengths,
+        source=source,
+        cache=cache,
+    )
+    return {
+        "bd": result["bd"],
+        "total_length": float(result["total_length"][0]),
+        "total_bd": float(result["total_bd"][0]),
+        "effective_length": float(result["effective_length"][0]),
+    }
+
+
+def main():
+    import argparse
+    import pandas as pd
+    from model_utils import BDModel
+
+    parser = argparse.ArgumentParser(description="Obliczenia BD dla całego zlecenia z pliku CSV.")
+    parser.add_argument("job", help="CSV z kolumnami: part, material, grubosc, V, kat, dlugosc.")
+    parser.add_argument("--quantities", help="CSV z kolumnami: part, ilosc.")
+    args = parser.parse_args()
+
+    job = pd.read_csv(args.job)
+    quantities = None
+    if args.quantities:
+        q = pd.read_csv(args.quantities)
+        quantities = dict(zip(q["part"], q["ilosc"]))
+
+    model = BDModel()
+    model.reload_models()
+    result = calculate_job(model, job["part"], job["material"], job["grubosc"], job["V"],
+                           job["kat"], job["dlugosc"], quantities)
+    summary = pd.DataFrame({
+        "part": result["parts"],
+        "total_length": result["total_length"],
+        "total_bd": result["total_bd"],
+        "effective_length": result["effective_length"],
+    })
+    print(summary.to_string(index=False))
+    print(f"Unikalne warunki gięcia: {result['unique_conditions']} (segmenty: {len(job)})")
+    if quantities is not None:
+        print(f"Długość efektywna zlecenia: {result['job_effective_length']:.2f} mm")
+
+
+if __name__ == "__main__":
+    main()
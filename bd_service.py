@@ -0,0 +1,418 @@
+"""Lokalna usługa HTTP/JSON do obliczania BD dla systemów CAM i ERP.
+
+Uruchomienie:
+    python bd_service.py --host 127.0.0.1 --port 8765
+
+Endpointy:
+    GET  /health              – stan usługi i wersja modeli
+    GET  /metrics             – liczniki żądań, paczek i czasów predykcji
+    POST /bd                  – {"grubosc", "V", "kat", "material"}
+    POST /bd/bulk             – {"items": [{"grubosc", "V", "kat", "material"}, ...]}
+    POST /flat-length         – {"grubosc", "V", "material", "segments": [{"dlugosc", "kat"}, ...]}
+    POST /flat-length/bulk    – {"parts": [<jak /flat-length>, ...]}
+
+Opcjonalne pole "part" (identyfikator detalu) trafia do dziennika obliczeń (audit_log).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import numpy as np
+
+from audit_log import audit
+from data_loader import load_data
+from instrumentation import setup_logging
+from model_utils import BDModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BATCH_WINDOW_MS = 5.0  # Okno, w którym żądania są łączone w jedną paczkę
+MAX_BATCH_SIZE = 4096
+MODEL_POLL_INTERVAL = 2.0  # Co ile sekund sprawdzamy zmiany w katalogu models/
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class ServiceMetrics:
+    """Proste liczniki usługi udostępniane przez /metrics."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.predictions = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.predict_time = 0.0
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def record_batch(self, size, elapsed):
+        self.batches += 1
+        self.predictions += size
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.predict_time += elapsed
+
+    def as_dict(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "predictions": self.predictions,
+            "batches": self.batches,
+            "avg_batch_size": round(self.predictions / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "predict_time_s": round(self.predict_time, 6),
+            "model_reloads": self.reloads,
+            "model_reload_errors": self.reload_errors,
+        }
+
+
+class BDBatcher:
+    """Łączy równoległe zapytania o BD w jedno wektorowe wywołanie predict na materiał."""
+
+    def __init__(self, model, metrics, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE):
+        self.model = model
+        self.metrics = metrics
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending = []  # Lista (material, t, V, kat, future)
+        self._pending_size = 0
+        self._flush_handle = None
+        self._flush_tasks = set()  # Trwające paczki – referencje chronią zadania przed usunięciem przez GC
+
+    async def predict(self, material, t, V, kat):
+        """Zwraca tablicę BD dla podanych tablic parametrów jednego materiału."""
+        t = np.asarray(t, dtype=float)
+        V = np.asarray(V, dtype=float)
+        kat = np.asarray(kat, dtype=float)
+        if t.size == 0:
+            return np.zeros(0)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((material, t, V, kat, future))
+        self._pending_size += t.size
+        if self._pending_size >= self.max_batch:
+            self._schedule_flush(loop, immediate=True)
+        elif self._flush_handle is None:
+            self._schedule_flush(loop)
+        return await future
+
+    def _schedule_flush(self, loop, immediate=False):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        if immediate:
+            self._flush_handle = None
+            self._start_flush(loop)
+        else:
+            self._flush_handle = loop.call_later(self.window, self._start_flush, loop)
+
+    def _start_flush(self, loop):
+        task = loop.create_task(self._flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task):
+        self._flush_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Błąd przetwarzania paczki BD", exc_info=task.exception())
+
+    async def _flush(self):
+        self._flush_handle = None
+        pending, self._pending, self._pending_size = self._pending, [], 0
+        if not pending:
+            return
+        by_material = {}
+        for entry in pending:
+            by_material.setdefault(entry[0], []).append(entry)
+        loop = asyncio.get_running_loop()
+        for material, entries in by_material.items():
+            t = np.concatenate([e[1] for e in entries])
+            V = np.concatenate([e[2] for e in entries])
+            kat = np.concatenate([e[3] for e in entries])
+            start = time.perf_counter()
+            try:
+                # Predykcja w osobnym wątku, żeby nie blokować pętli zdarzeń
+                result = await loop.run_in_executor(None, self.model.oblicz_bd_batch, t, V, kat, material)
+            except Exception as e:
+                for entry in entries:
+                    if not entry[4].done():
+                        entry[4].set_exception(e)
+                continue
+            self.metrics.record_batch(t.size, time.perf_counter() - start)
+            offset = 0
+            for entry in entries:
+                size = entry[1].size
+                if not entry[4].done():
+                    entry[4].set_result(result[offset:offset + size])
+                offset += size
+
+
+class ModelWatcher:
+    """Przeładowuje modele bez przerywania pracy usługi, gdy pliki w models/ się zmienią."""
+
+    def __init__(self, model, metrics, interval=MODEL_POLL_INTERVAL):
+        self.model = model
+        self.metrics = metrics
+        self.interval = interval
+        self._mtimes = model.model_mtimes()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            mtimes = self.model.model_mtimes()
+            if mtimes == self._mtimes or None in mtimes:
+                continue
+            try:
+                # Nowe modele wczytujemy w tle; podmiana następuje dopiero po wczytaniu obu
+                await loop.run_in_executor(None, self.model.reload_models)
+                self._mtimes = mtimes
+                self.metrics.reloads += 1
+            except Exception as e:
+                # Plik może być jeszcze zapisywany – spróbujemy ponownie przy następnym sprawdzeniu
+                self.metrics.reload_errors += 1
+                logger.warning("Błąd podczas przeładowania modeli: %s", e)
+
+
+class RequestError(Exception):
+    """Błąd walidacji żądania zwracany klientowi jako 400."""
+
+
+def _require_number(payload, key):
+    try:
+        return float(payload[key])
+    except KeyError:
+        raise RequestError(f"Brak pola '{key}'.")
+    except (TypeError, ValueError):
+        raise RequestError(f"Pole '{key}' musi być liczbą.")
+
+
+def _require_material(payload):
+    material = payload.get("material")
+    if material not in ("CZ", "N"):
+        raise RequestError("Pole 'material' musi mieć wartość 'CZ' lub 'N'.")
+    return material
+
+
+class BDService:
+    """Obsługa endpointów usługi."""
+
+    def __init__(self, model, window_ms=BATCH_WINDOW_MS):
+        self.model = model
+        self.metrics = ServiceMetrics()
+        self.batcher = BDBatcher(model, self.metrics, window_ms=window_ms)
+        self.watcher = ModelWatcher(model, self.metrics)
+        self.routes = {
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/metrics"): self.handle_metrics,
+            ("POST", "/bd"): self.handle_bd,
+            ("POST", "/bd/bulk"): self.handle_bd_bulk,
+            ("POST", "/flat-length"): self.handle_flat_length,
+            ("POST", "/flat-length/bulk"): self.handle_flat_length_bulk,
+        }
+
+    async def handle_health(self, payload):
+        return {"status": "ok", "model_version": self.model.fingerprint}
+
+    async def handle_metrics(self, payload):
+        metrics = self.metrics.as_dict()
+        metrics["model_version"] = self.model.fingerprint
+        return metrics
+
+    async def handle_bd(self, payload):
+        material = _require_material(payload)
+        t = _require_number(payload, "grubosc")
+        V = _require_number(payload, "V")
+        kat = _require_number(payload, "kat")
+        bd = 0.0 if kat == 0 else float((await self.batcher.predict(material, [t], [V], [kat]))[0])
+        audit.record("service", self.model.fingerprint, payload.get("part"), material, t, V, kat, None, bd)
+        return {"bd": bd, "model_version": self.model.fingerprint}
+
+    async def handle_bd_bulk(self, payload):
+        items = payload.get("items")
+        if not isinstance(items, list):
+            raise RequestError("Pole 'items' musi być listą.")
+        materials = [_require_material(item) for item in items]
+        t = np.array([_require_number(item, "grubosc") for item in items])
+        V = np.array([_require_number(item, "V") for item in items])
+        kat = np.array([_require_number(item, "kat") for item in items])
+        bd = np.zeros(len(items))
+        masks = {}
+        for material in set(materials):
+            mask = np.array([m == material for m in materials]) & (kat != 0)
+            if mask.any():
+                masks[material] = mask
+        # Materiały są zgłaszane jednocześnie, żeby trafiły do tego samego okna łączenia paczek
+        results = await asyncio.gather(*(self.batcher.predict(material, t[mask], V[mask], kat[mask])
+                                         for material, mask in masks.items()))
+        for mask, values in zip(masks.values(), results):
+            bd[mask] = values
+        audit.record("service", self.model.fingerprint, [item.get("part") for item in items], materials,
+                     t, V, kat, None, bd)
+        return {"bd": bd.tolist(), "model_version": self.model.fingerprint}
+
+    async def handle_flat_length(self, payload):
+        return await self._flat_length(payload)
+
+    async def handle_flat_length_bulk(self, payload):
+        parts = payload.get("parts")
+        if not isinstance(parts, list):
+            raise RequestError("Pole 'parts' musi być listą.")
+        results = await asyncio.gather(*(self._flat_length(part) for part in parts))
+        return {"parts": list(results), "model_version": self.model.fingerprint}
+
+    async def _flat_length(self, part):
+        material = _require_material(part)
+        t = _require_number(part, "grubosc")
+        V = _require_number(part, "V")
+        segments = part.get("segments")
+        if not isinstance(segments, list):
+            raise RequestError("Pole 'segments' musi być listą.")
+        dlugosci = np.array([_require_number(s, "dlugosc") for s in segments])
+        katy = np.array([_require_number(s, "kat") for s in segments])
+        bd = np.zeros(len(segments))
+        mask = katy != 0
+        if mask.any():
+            n = int(mask.sum())
+            bd[mask] = await self.batcher.predict(material, np.full(n, t), np.full(n, V), katy[mask])
+        audit.record("service", self.model.fingerprint, part.get("part"), material, t, V, katy, dlugosci, bd)
+        return {
+            "total_length": float(dlugosci.sum()),
+            "total_bd": float(bd.sum()),
+            "effective_length": float(np.maximum(dlugosci - bd, 0).sum()),
+            "bd": bd.tolist(),
+        }
+
+    async def dispatch(self, method, path, body):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                return 405, {"error": f"Metoda {method} nie jest obsługiwana dla {path}."}
+            return 404, {"error": f"Nieznany endpoint: {path}"}
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise RequestError("Treść żądania musi być obiektem JSON.")
+            return 200, await handler(payload)
+        except (RequestError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"Błąd obliczeń: {e}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except ValueError:
+                    # Linia dłuższa niż limit bufora StreamReader (64 KiB)
+                    await self._reject(writer, 431, "Zbyt długa linia żądania.")
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self._reject(writer, 400, "Niepoprawne żądanie HTTP.")
+                    break
+                headers = {}
+                try:
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                except ValueError:
+                    await self._reject(writer, 431, "Zbyt długi nagłówek żądania.")
+                    break
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # Bez poprawnej długości nie da się odczytać treści – zamykamy połączenie
+                    await self._reject(writer, 400, "Niepoprawny nagłówek Content-Length.")
+                    break
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if length > MAX_BODY_SIZE:
+                    await self._reject(writer, 413, "Zbyt duże żądanie.")
+                    break
+                body = await reader.readexactly(length) if length else b""
+                self.metrics.requests += 1
+                status, result = await self.dispatch(method.upper(), target.split("?", 1)[0], body)
+                if status != 200:
+                    self.metrics.errors += 1
+                await self._write_response(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _reject(self, writer, status, message):
+        """Odrzuca żądanie przed obsługą (liczone jako żądanie i błąd); połączenie jest zamykane."""
+        self.metrics.requests += 1
+        self.metrics.errors += 1
+        await self._write_response(writer, status, {"error": message}, False)
+
+    @staticmethod
+    async def _write_response(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        watcher_task = asyncio.create_task(self.watcher.run())
+        logger.info("Usługa BD nasłuchuje na http://%s:%s (modele %s)", host, port, self.model.fingerprint)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher_task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalna usługa HTTP obliczania BD.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--batch-window-ms", type=float, default=BATCH_WINDOW_MS,
+                        help="Czas zbierania żądań w jedną paczkę predykcji.")
+    parser.add_argument("--log-level", default=None, help="Poziom logowania (DEBUG, INFO, WARNING...).")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level)
+    model = BDModel()
+    model.train_models(load_data(), force_retrain=False)
+    service = BDService(model, window_ms=args.batch_window_ms)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        logger.info("Zatrzymano usługę BD.")
+
+
+if __name__ == "__main__":
+    main()
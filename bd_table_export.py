@@ -0,0 +1,141 @@
+"""Eksport pełnych tabel BD z modeli do plików XML sterownika prasy.
+
+Format jest taki sam, jak czytany przez data_list.load_data_from_xml:
+    <Materials>
+      <Material Name="1.4301">
+        <DataTable SheetThickness="2" DieOpeningWidth="16">
+          <DTEntries>
+            <DTEntry BendAngle="90" DX="3.2125"/>
+
+Dla każdego materiału modelu (CZ, N) wykonywana jest jedna predykcja dla wszystkich
+kombinacji grubość × V × kąt; pliki materiałów maszyny (MATERIAL_MAP) są zapisywane
+strumieniowo, tabela po tabeli.
+
+Przykład:
+    python bd_table_export.py eksport/ --angle-start 10 --angle-stop 180 --angle-step 1 --verify
+"""
+
+import argparse
+import logging
+import os
+import time
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from data_list import MATERIAL_MAP
+from instrumentation import stats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANGLES = (10.0, 180.0, 1.0)  # Początek, koniec (włącznie), krok [°]
+DX_DECIMALS = 4
+
+
+def angle_grid(start, stop, step):
+    """Kąty od start do stop włącznie z podanym krokiem."""
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    # Zaokrąglenie usuwa błędy sumowania kroku, żeby kąty zapisane w XML wracały jako te same liczby
+    return np.round(start + step * np.arange(max(count, 1)), 6)
+
+
+def machine_files():
+    """Nazwa pliku XML i materiał modelu dla każdego materiału maszyny."""
+    return [(f"{name}.xml", name, material) for name, material in sorted(MATERIAL_MAP.items())]
+
+
+def predict_tables(model, thicknesses, widths, angles, materials):
+    """Macierze BD (kombinacja grubość/V × kąt) – jedno wywołanie predict na materiał."""
+    n_dies, n_angles = len(thicknesses), len(angles)
+    t = np.repeat(thicknesses, n_angles)
+    V = np.repeat(widths, n_angles)
+    kat = np.tile(angles, n_dies)
+    tables = {}
+    for material in materials:
+        with stats.timer("export.predict"):
+            bd = model.oblicz_bd_batch(t, V, kat, material)
+        bd = np.where(kat == 0, 0.0, bd)  # Brak gięcia – brak ubytku (jak w bd_core)
+        tables[material] = bd.reshape(n_dies, n_angles)
+    return tables
+
+
+def write_material_xml(file_path, machine_name, thicknesses, widths, angles, bd_matrix):
+    """Zapisuje tabele jednego materiału strumieniowo (bez budowania drzewa XML w pamięci)."""
+    angle_texts = [f"{angle:g}" for angle in angles]
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write('<?xml version="1.0" encoding="utf-8"?>\n<Materials>\n')
+        file.write(f"  <Material Name={quoteattr(machine_name)}>\n")
+        for thickness, width, row in zip(thicknesses, widths, bd_matrix):
+            entries = "".join(
+                f'        <DTEntry BendAngle="{angle}" DX="{dx:.{DX_DECIMALS}f}"/>\n'
+                for angle, dx in zip(angle_texts, row.tolist())
+            )
+            file.write(f'    <DataTable SheetThickness="{thickness:g}" DieOpeningWidth="{width:g}">\n'
+                       f"      <DTEntries>\n{entries}      </DTEntries>\n    </DataTable>\n")
+        file.write("  </Material>\n</Materials>\n")
+
+
+def export_tables(model, folder, thicknesses, widths, angles):
+    """Zapisuje pliki XML wszystkich materiałów maszyny; zwraca (ścieżki, tabele BD)."""
+    os.makedirs(folder, exist_ok=True)
+    files = machine_files()
+    with stats.timer("export.tables"):
+        tables = predict_tables(model, thicknesses, widths, angles, sorted({m for _, _, m in files}))
+        paths = []
+        for filename, machine_name, material in files:
+            path = os.path.join(folder, filename)
+            write_material_xml(path, machine_name, thicknesses, widths, angles, tables[material])
+            paths.append(path)
+    logger.info("Zapisano tabele BD: %d kombinacji grubość/V × %d kątów w %s",
+                len(thicknesses), len(angles), folder)
+    return paths, tables
+
+
+def verify_export(folder, thicknesses, widths, angles, tables):
+    """Wczytuje pliki przez data_list.load_data_from_xml; zwraca maksymalną różnicę BD."""
+    from data_list import load_data_from_xml
+    df = load_data_from_xml(folder)
+    expected_rows = sum(tables[m].size for _, _, m in machine_files())
+    if len(df) != expected_rows:
+        raise ValueError(f"Wczytano {len(df)} wpisów zamiast {expected_rows}.")
+    die_index = {(t, v): i for i, (t, v) in enumerate(zip(thicknesses.tolist(), widths.tolist()))}
+    angle_index = {a: j for j, a in enumerate(angles.tolist())}
+    expected = np.array([
+        tables[material][die_index[(t, v)], angle_index[kat]]
+        for material, t, v, kat in zip(df['Material'], df['Grubosc'], df['V'], df['Kat'])
+    ])
+    return float(np.max(np.abs(df['BD'].to_numpy() - expected))) if len(df) else 0.0
+
+
+def main():
+    from matrix_config_editor import load_matrix_config
+    from die_comparison import allowed_dies
+    from model_utils import BDModel
+
+    parser = argparse.ArgumentParser(description="Eksport tabel BD z modeli do XML sterownika prasy.")
+    parser.add_argument("folder", help="Folder docelowy plików XML.")
+    parser.add_argument("--angle-start", type=float, default=DEFAULT_ANGLES[0])
+    parser.add_argument("--angle-stop", type=float, default=DEFAULT_ANGLES[1])
+    parser.add_argument("--angle-step", type=float, default=DEFAULT_ANGLES[2])
+    parser.add_argument("--verify", action="store_true",
+                        help="Wczytaj pliki z powrotem przez load_data_from_xml i porównaj wartości.")
+    args = parser.parse_args()
+
+    thicknesses, widths = allowed_dies(load_matrix_config())
+    if len(thicknesses) == 0:
+        parser.error("Brak dozwolonych matryc w matrix_config.json.")
+    angles = angle_grid(args.angle_start, args.angle_stop, args.angle_step)
+
+    model = BDModel()
+    model.reload_models()
+    start = time.perf_counter()
+    paths, tables = export_tables(model, args.folder, thicknesses, widths, angles)
+    print(f"Zapisano {len(paths)} pliki ({len(thicknesses)} matryc × {len(angles)} kątów) "
+          f"w {time.perf_counter() - start:.2f} s")
+    if args.verify:
+        difference = verify_export(args.folder, thicknesses, widths, angles, tables)
+        print(f"Weryfikacja importu: maksymalna różnica BD {difference:.6f} mm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Benchmark ścieżek GUI na syntetycznych rysunkach DXF (Qt w trybie offscreen).
+
+Mierzy czasy: MainWindow.open_dxf_file (wczytanie przez load_dxf_file), adjust_scene_origin
+(w ramach wczytania, z licznika stats), wybór linii gięcia przez CustomGraphicsView.mouseReleaseEvent, insert_segment_sorted,
+recalc_segments oraz calculate_total_bd. Wynik jest zapisywany jako JSON do porównań
+między wersjami. Okna komunikatów są przechwytywane – błąd wczytania lub obliczeń przerywa
+benchmark zamiast zawiesić go na modalnym oknie.
+
+Przykład:
+    python benchmark_gui.py --sizes 10 100 1000 10000 100000 --out bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+from PyQt5.QtCore import QLineF, QT_VERSION_STR  # noqa: E402
+
+from bd_core import PredictionCache  # noqa: E402
+from dxf_generator import counts_for_total, generate_dxf  # noqa: E402
+from dxf_stream import GeometryCache  # noqa: E402
+from gui_harness import MessageBoxGuard, click, git_revision  # noqa: E402
+from instrumentation import stats  # noqa: E402
+from model_utils import BDModel  # noqa: E402
+from ui_main import MainWindow  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+MAX_PICKS = 50  # Liczba kliknięć w linie gięcia na jeden pomiar
+SEGMENT_INSERTS = 50
+
+
+def _summary(samples_ms):
+    return {
+        "runs": len(samples_ms),
+        "min_ms": round(min(samples_ms), 3),
+        "median_ms": round(statistics.median(samples_ms), 3),
+        "max_ms": round(max(samples_ms), 3),
+    }
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def _last_time(name):
+    """Czas ostatniego pomiaru operacji zarejestrowanej w stats [ms]."""
+    return stats.timers[name].samples[-1]
+
+
+def _bending_lines(window):
+    return [item for item in window.dxf_scene.items() if item.data(0) == "bending"]
+
+
+def bench_size(window, path, repeat):
+    results = {"load_dxf_file": [], "adjust_scene_origin": [], "pick_bending_line": [],
+               "insert_segment_sorted": [], "recalc_segments": [], "calculate_total_bd": []}
+    for _ in range(repeat):
+        # Każde powtórzenie mierzy zimny start – bez geometrii i predykcji z poprzedniego przebiegu
+        window.geometry_cache = GeometryCache()
+        window.prediction_cache = PredictionCache()
+        results["load_dxf_file"].append(_timed(window.open_dxf_file, path))
+        results["adjust_scene_origin"].append(_last_time("dxf.adjust_scene_origin"))
+
+        # Klikamy w środek kolejnych linii gięcia przy powiększeniu pozwalającym je rozróżnić
+        view = window.dxf_view
+        view.resetTransform()
+        for item in _bending_lines(window)[:MAX_PICKS]:
+            line = QLineF(item.mapToScene(item.line().p1()), item.mapToScene(item.line().p2()))
+            view.centerOn(line.center())
+            results["pick_bending_line"].append(_timed(click, view, line.center()))
+
+        for i in range(SEGMENT_INSERTS):
+            results["insert_segment_sorted"].append(
+                _timed(window.insert_segment_sorted, float(i * 7 % 500), line_id=None))
+        results["recalc_segments"].append(_timed(window.recalc_segments))
+        results["calculate_total_bd"].append(_timed(window.calculate_total_bd))
+    return {name: _summary(samples) for name, samples in results.items() if samples}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ścieżek GUI na syntetycznych plikach DXF.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Łączne liczby obiektów w generowanych rysunkach.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Plik wynikowy JSON (domyślnie standardowe wyjście).")
+    args = parser.parse_args()
+
+    from audit_log import audit
+    audit.enabled = False  # Obliczenia benchmarku nie trafiają do produkcyjnego dziennika BD
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    model = BDModel()
+    model.reload_models()
+    window = MainWindow(None, model)
+    window.part_usage_enabled = False  # Benchmark nie zapisuje parametrów detali w bibliotece
+    window.grubosc_input.addItem("2.0")
+    window.V_input.addItem("16.0")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir, MessageBoxGuard(raise_errors=True):
+        for size in args.sizes:
+            path = os.path.join(tmp_dir, f"synthetic_{size}.dxf")
+            counts = generate_dxf(path, seed=args.seed, **counts_for_total(size))
+            timings = bench_size(window, path, args.repeat)
+            report["sizes"].append({"entities": size, "counts": counts, "timings": timings})
+            app.processEvents()
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,13 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QHBoxLayout, QPushButton, QMessageBox
 )
 from PyQt5.QtGui import QIcon
+import logging
 import pandas as pd
 from data_loader import save_data_to_json
 from utils import parse_decimal_input
 
+logger = logging.getLogger(__name__)
+
 
 def safe_to_numeric(value):
     """Bezpieczna konwersja wartości na liczbę dziesiętną."""
@@ -22,6 +25,9 @@ DATA_FILE = 'Ubytki.xlsx'
 
 class DataEditorDialog(QDialog):
     """Okno dialogowe do edycji danych."""
+    # Sloty mierzone przez watchdog UI (ui_watchdog.instrument_class)
+    TIMED_SLOTS = ("add_row", "remove_row", "move_row_up", "move_row_down", "save_changes",)
+
     def __init__(self, data, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Edycja Danych Treningowych")
@@ -152,12 +158,12 @@ class DataEditorDialog(QDialog):
             self.parent().data = new_data
 
             # Sprawdź, czy model istnieje
-            print(f"Model przekazany z obiektu nadrzędnego: {getattr(self.parent(), 'model', None)}")
+            logger.debug("Model przekazany z obiektu nadrzędnego: %s", getattr(self.parent(), 'model', None))
             if hasattr(self.parent(), "model") and self.parent().model is not None:
                 self.parent().model.train_models(new_data, force_retrain=True)
-                print("Model przetrenowano na nowych danych.")
+                logger.info("Model przetrenowano na nowych danych.")
             else:
-                print("Nie znaleziono modelu w obiekcie nadrzędnym.")
+                logger.warning("Nie znaleziono modelu w obiekcie nadrzędnym.")
 
             QMessageBox.information(self, "Sukces", "Dane zapisano i modele przetrenowano.")
             self.accept()
@@ -1,7 +1,10 @@
 import os
+import logging
 import xml.etree.ElementTree as ET
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 # Mapowanie oryginalnych nazw na oczekiwane wartości
 MATERIAL_MAP = {
     'Al Mg 3': 'CZ',
@@ -45,7 +48,7 @@ def load_data_from_xml(folder_path):
                             'BD': bd
                         })
         else:
-            print(f"Plik {filename} nie istnieje w folderze {folder_path}.")
+            logger.warning("Plik %s nie istnieje w folderze %s.", filename, folder_path)
     df = pd.DataFrame(data)
     df = df.sort_values(['Grubosc', 'V', 'Kat']).reset_index(drop=True)
 
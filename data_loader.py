@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 import json
+import logging
 
 from matrix_config_editor import load_matrix_config
 from dotenv import load_dotenv
@@ -11,6 +12,8 @@ DATA_FILE = os.getenv('DATA_FILE', 'default_data.json')  # Domyślna wartość,
 DATA_FILE_EXCEL = 'Ubytki.xlsx'
 DATA_FILE_JSON = 'data.json'
 
+logger = logging.getLogger(__name__)
+
 
 def load_data():
     """Wczytuje dane z pliku JSON lub Excela."""
@@ -33,8 +36,7 @@ def load_data_from_json(file_path="data.json"):
     try:
         with open(file_path, "r") as file:
             data = json.load(file)  # Wczytaj dane JSON
-            print("Wczytane dane JSON:")
-            print(data)  # Debug: Wyświetl pełną zawartość
+            logger.info("Wczytano %d rekordów danych treningowych z %s", len(data), file_path)
         return pd.DataFrame(data)  # Konwersja na DataFrame
     except json.JSONDecodeError as e:
         raise ValueError(f"Nie udało się wczytać danych JSON: {e}")
@@ -45,7 +47,7 @@ def save_data_to_json(data, file_path="data.json"):
     try:
         with open(file_path, "w") as file:
             json.dump(data.to_dict(orient="records"), file, indent=4)
-            print(f"Dane zapisano do pliku JSON: {file_path}")
+            logger.info("Dane zapisano do pliku JSON: %s", file_path)
     except Exception as e:
         raise IOError(f"Nie udało się zapisać danych do JSON: {e}")
 
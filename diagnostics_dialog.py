@@ -0,0 +1,119 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton,
+    QComboBox, QLabel, QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import Qt
+
+from instrumentation import stats
+
+# Operacje mierzone w aplikacji, dla których można zażądać profilu cProfile
+PROFILED_OPERATIONS = ["bd.predict_batch", "bd.calculate_job", "bd.calculate_total", "dxf.load", "view.hit_test", "segments.recalc"]
+
+
+def _fmt(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+class DiagnosticsDialog(QDialog):
+    """Okno z licznikami wydajności, eksportem do JSON i opcjonalnym profilowaniem."""
+    # Sloty mierzone przez watchdog UI (ui_watchdog.instrument_class)
+    TIMED_SLOTS = ("request_profile", "refresh", "reset_stats", "export_json",)
+
+    COLUMNS = ["Nazwa", "Typ", "Liczba", "Suma", "Średnia", "p50", "p95", "Max"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostyka Wydajności")
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        # Profilowanie wybranej operacji
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Profiluj operację:"))
+        self.operation_input = QComboBox()
+        self.operation_input.setEditable(True)
+        profile_layout.addWidget(self.operation_input)
+        profile_button = QPushButton("Profiluj następne wywołanie")
+        profile_button.clicked.connect(self.request_profile)
+        profile_layout.addWidget(profile_button)
+        layout.addLayout(profile_layout)
+
+        self.profile_label = QLabel()
+        layout.addWidget(self.profile_label)
+
+        button_layout = QHBoxLayout()
+        refresh_button = QPushButton("Odśwież")
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+        reset_button = QPushButton("Resetuj")
+        reset_button.clicked.connect(self.reset_stats)
+        button_layout.addWidget(reset_button)
+        export_button = QPushButton("Eksportuj JSON")
+        export_button.clicked.connect(self.export_json)
+        button_layout.addWidget(export_button)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+        self.resize(800, 400)
+
+    def refresh(self):
+        snapshot = stats.snapshot()
+        rows = []
+        for name, h in sorted(snapshot["timers_ms"].items()):
+            rows.append([name, "czas [ms]", h["count"], h["total"], h["mean"], h["p50"], h["p95"], h["max"]])
+        for name, h in sorted(snapshot["histograms"].items()):
+            rows.append([name, "histogram", h["count"], h["total"], h["mean"], h["p50"], h["p95"], h["max"]])
+        for name, value in sorted(snapshot["counters"].items()):
+            rows.append([name, "licznik", value, None, None, None, None, None])
+
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(_fmt(value))
+                if col >= 2:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+        self.table.resizeColumnsToContents()
+
+        current = self.operation_input.currentText()
+        self.operation_input.clear()
+        self.operation_input.addItems(sorted(set(PROFILED_OPERATIONS) | set(snapshot["timers_ms"])))
+        if current:
+            self.operation_input.setCurrentText(current)
+
+        pending = stats.pending_profiles()
+        text = f"Oczekujące profile: {', '.join(pending)}" if pending else ""
+        if stats.last_profile:
+            text += f"\nOstatni profil: {stats.last_profile}"
+        self.profile_label.setText(text.strip())
+
+    def request_profile(self):
+        name = self.operation_input.currentText().strip()
+        if name:
+            stats.profile_next(name)
+            self.refresh()
+
+    def reset_stats(self):
+        stats.reset()
+        self.refresh()
+
+    def export_json(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Eksportuj Statystyki", "stats.json", "Pliki JSON (*.json)")
+        if not file_path:
+            return
+        try:
+            stats.export_json(file_path)
+        except Exception as e:
+            QMessageBox.warning(self, "Błąd", f"Nie udało się wyeksportować statystyk:\n{e}")
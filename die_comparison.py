@@ -0,0 +1,173 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QCheckBox, QLabel
+)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QColor
+import numpy as np
+
+from instrumentation import stats
+from matrix_config_editor import load_matrix_config
+
+MATERIALS = ("CZ", "N")
+REFRESH_DELAY_MS = 100  # Zmiany w tabeli segmentów są zbierane przed odświeżeniem
+
+
+def allowed_dies(config):
+    """Zwraca tablice (grubość, V) wszystkich kombinacji dozwolonych w konfiguracji matryc."""
+    pairs = sorted((float(t), float(v)) for t, widths in config.items() for v in widths)
+    if not pairs:
+        return np.zeros(0), np.zeros(0)
+    pairs = np.array(pairs)
+    return pairs[:, 0], pairs[:, 1]
+
+
+class DieComparison:
+    """Wylicza BD i długość efektywną detalu dla każdej dozwolonej kombinacji grubość/V/materiał.
+
+    Macierz BD (kombinacja × unikalny kąt) jest liczona jednym wywołaniem predict na materiał
+    i zapamiętywana – zmiana samych długości segmentów nie wymaga ponownej predykcji.
+    """
+
+    def __init__(self, model, materials=MATERIALS):
+        self.model = model
+        self.materials = materials
+        self._cache_key = None
+        self._bd_matrix = None  # Słownik materiał -> macierz (kombinacje × kąty)
+
+    def _bd_for_angles(self, thicknesses, widths, angles):
+        key = (self.model.fingerprint, tuple(thicknesses), tuple(widths), tuple(angles))
+        if key == self._cache_key:
+            return self._bd_matrix
+        n_dies, n_angles = len(thicknesses), len(angles)
+        t = np.repeat(thicknesses, n_angles)
+        V = np.repeat(widths, n_angles)
+        kat = np.tile(angles, n_dies)
+        bd_matrix = {}
+        for material in self.materials:
+            bd_matrix[material] = self.model.oblicz_bd_batch(t, V, kat, material).reshape(n_dies, n_angles)
+        self._cache_key, self._bd_matrix = key, bd_matrix
+        return bd_matrix
+
+    def compare(self, lengths, angles, config=None):
+        """Zwraca listę wyników dla wszystkich kombinacji (grubość, V, materiał)."""
+        with stats.timer("dies.compare"):
+            config = load_matrix_config() if config is None else config
+            thicknesses, widths = allowed_dies(config)
+            lengths = np.asarray(lengths, dtype=float)
+            angles = np.asarray(angles, dtype=float)
+            # Dla kąta 0 BD wynosi 0 – nie wymaga predykcji
+            unique_angles, inverse = np.unique(angles, return_inverse=True)
+            bent = unique_angles != 0
+            bd_matrix = self._bd_for_angles(thicknesses, widths, unique_angles[bent])
+
+            results = []
+            total_length = float(lengths.sum())
+            for material in self.materials:
+                bd_unique = np.zeros((len(thicknesses), len(unique_angles)))
+                bd_unique[:, bent] = bd_matrix[material]
+                bd_segments = bd_unique[:, inverse]  # Kombinacje × segmenty
+                total_bd = bd_segments.sum(axis=1)
+                effective = np.maximum(lengths[np.newaxis, :] - bd_segments, 0).sum(axis=1)
+                for i in range(len(thicknesses)):
+                    results.append({
+                        "grubosc": float(thicknesses[i]),
+                        "V": float(widths[i]),
+                        "material": material,
+                        "total_length": total_length,
+                        "total_bd": float(total_bd[i]),
+                        "effective_length": float(effective[i]),
+                    })
+            results.sort(key=lambda r: (r["grubosc"], r["V"], r["material"]))
+            return results
+
+
+class DieComparisonDialog(QDialog):
+    """Okno porównania matryc – odświeżane na bieżąco przy zmianie segmentów."""
+    # Sloty mierzone przez watchdog UI (ui_watchdog.instrument_class)
+    TIMED_SLOTS = ("refresh", "schedule_refresh",)
+
+    COLUMNS = ["Grubość [mm]", "V [mm]", "Materiał", "Łączny BD [mm]", "Długość efektywna [mm]"]
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setWindowTitle("Porównanie Matryc")
+        self.main_window = main_window
+        self.comparison = DieComparison(main_window.model)
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self.init_ui()
+        self.connect_main_window()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        options_layout = QHBoxLayout()
+        self.current_thickness_only = QCheckBox("Tylko bieżąca grubość")
+        self.current_thickness_only.setChecked(True)
+        self.current_thickness_only.stateChanged.connect(self.refresh)
+        options_layout.addWidget(self.current_thickness_only)
+        self.summary_label = QLabel()
+        options_layout.addWidget(self.summary_label)
+        layout.addLayout(options_layout)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+        self.resize(600, 400)
+
+    def connect_main_window(self):
+        mw = self.main_window
+        mw.table.itemChanged.connect(self.schedule_refresh)
+        mw.table.model().rowsInserted.connect(self.schedule_refresh)
+        mw.table.model().rowsRemoved.connect(self.schedule_refresh)
+        mw.grubosc_input.currentIndexChanged.connect(self.schedule_refresh)
+        mw.V_input.currentIndexChanged.connect(self.schedule_refresh)
+        mw.material_input.currentIndexChanged.connect(self.schedule_refresh)
+
+    def schedule_refresh(self, *args):
+        if self.isVisible():
+            self._refresh_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self):
+        mw = self.main_window
+        if mw.model is None:
+            return
+        self.comparison.model = mw.model
+        lengths, angles = mw.get_segments()
+        config = load_matrix_config()
+        current_t = mw.grubosc_input.currentText()
+        if self.current_thickness_only.isChecked() and current_t:
+            config = {t: widths for t, widths in config.items() if float(t) == float(current_t)}
+        try:
+            results = self.comparison.compare(lengths, angles, config)
+        except Exception as e:
+            self.summary_label.setText(f"Błąd obliczeń: {e}")
+            return
+
+        current = (current_t, mw.V_input.currentText(), mw.material_input.currentText())
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(results))
+        for row, r in enumerate(results):
+            values = [r["grubosc"], r["V"], r["material"], r["total_bd"], r["effective_length"]]
+            is_current = (
+                current[0] and current[1]
+                and r["grubosc"] == float(current[0]) and r["V"] == float(current[1])
+                and r["material"] == current[2]
+            )
+            for col, value in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, round(value, 2) if isinstance(value, float) else value)
+                if is_current:
+                    item.setBackground(QColor("lightgreen"))
+                self.table.setItem(row, col, item)
+        self.table.setSortingEnabled(True)
+        self.summary_label.setText(f"Segmenty: {len(lengths)}, kombinacje: {len(results)}")
@@ -0,0 +1,88 @@
+"""Stan dokumentów otwartych w kartach MainWindow i ich wczytywanie w tle.
+
+Scena i tabela segmentów w MainWindow należą zawsze do aktywnej karty. Nieaktywna karta
+przechowuje tylko zwartą geometrię (CompactGeometry) oraz stan segmentów, parametrów
+i widoku – elementy sceny są tworzone ponownie przy jej aktywacji.
+"""
+
+import logging
+import os
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from dxf_stream import GeometryCache, load_geometry
+
+logger = logging.getLogger(__name__)
+
+
+def file_key(file_path):
+    """(mtime, rozmiar) pliku albo None, gdy plik nie istnieje."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+class DocumentState:
+    """Dokument jednej karty."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.geometry = None  # None – plik jest jeszcze wczytywany
+        self.file_key = None
+        self.error = None
+        self.closed = False
+        self.loading = False  # Trwa wczytywanie w tle (ParseTask)
+        # Zapisywane przy dezaktywacji karty
+        self.segments = []  # (absolutne x, kąt, klucz linii gięcia lub None, BD)
+        self.params = None
+        self.result_text = ""
+        self.view_transform = None
+        self.view_center = None
+
+    @property
+    def title(self):
+        name = os.path.basename(self.file_path)
+        if self.error:
+            return f"{name} (błąd)"
+        return name if self.geometry is not None else f"{name} (wczytywanie...)"
+
+    def set_geometry(self, geometry, key=None):
+        self.loading = False
+        self.geometry = geometry
+        self.file_key = key if key is not None else file_key(self.file_path)
+        self.error = None
+
+    def reset(self, file_path, geometry):
+        """Nowy plik w tej samej karcie – stan segmentów i widoku jest czyszczony."""
+        self.__init__(file_path)
+        self.set_geometry(geometry)
+
+    def is_stale(self):
+        return self.geometry is not None and file_key(self.file_path) != self.file_key
+
+
+class ParseSignals(QObject):
+    finished = pyqtSignal(object, object, object)  # Dokument, geometria, (ścieżka, mtime, rozmiar)
+    failed = pyqtSignal(object, str)
+
+
+class ParseTask(QRunnable):
+    """Wczytuje plik DXF do CompactGeometry w puli wątków."""
+
+    def __init__(self, document, signals):
+        super().__init__()
+        self.document = document
+        self.file_path = document.file_path
+        self.signals = signals
+
+    def run(self):
+        try:
+            # Klucz odczytany przed parsowaniem – zmiana pliku w trakcie unieważni wpis w cache
+            key = GeometryCache.key(self.file_path)
+            geometry = load_geometry(self.file_path)
+            self.signals.finished.emit(self.document, geometry, key)
+        except Exception as e:
+            logger.exception("Błąd wczytywania pliku DXF %s w tle", self.file_path)
+            self.signals.failed.emit(self.document, str(e))
@@ -0,0 +1,133 @@
+"""Obsługa bloków DXF (INSERT) z geometrią współdzieloną między wystąpieniami.
+
+Każda definicja bloku jest zamieniana raz na QPainterPath (razem z blokami zagnieżdżonymi)
+i przechowywana w BlockCache. Każde wystąpienie INSERT jest rysowane (w
+CompactGeometry.add_to_scene) jako pojedynczy QGraphicsPathItem z transformacją, który
+współdzieli ścieżkę z innymi wystąpieniami (QPainterPath jest współdzielony niejawnie). Linie gięcia (kolor 2) z wnętrza bloków są przeliczane do
+współrzędnych świata i dodawane jako zwykłe linie gięcia, żeby dało się je zaznaczać.
+"""
+
+import logging
+
+from PyQt5.QtCore import QPointF, QRectF, QLineF
+from PyQt5.QtGui import QPainterPath, QTransform
+
+from instrumentation import stats
+from dxf_tessellation import FIXED_LEVEL, curve_from_entity
+
+logger = logging.getLogger(__name__)
+
+MAX_BLOCK_DEPTH = 16  # Ochrona przed cyklicznymi odwołaniami między blokami
+BENDING_COLOR = 2
+
+
+def insert_transforms(insert):
+    """Zwraca listę QTransform (współrzędne sceny z odwróconą osią Y) dla INSERT/MINSERT."""
+    dxf = insert.dxf
+    ix, iy = dxf.insert.x, dxf.insert.y
+    sx = dxf.get("xscale", 1.0)
+    sy = dxf.get("yscale", 1.0)
+    rotation = dxf.get("rotation", 0.0)
+    columns = max(int(dxf.get("column_count", 1)), 1)
+    rows = max(int(dxf.get("row_count", 1)), 1)
+    column_spacing = dxf.get("column_spacing", 0.0)
+    row_spacing = dxf.get("row_spacing", 0.0)
+    mirrored = dxf.hasattr("extrusion") and dxf.extrusion.z < 0
+
+    transforms = []
+    for row in range(rows):
+        for column in range(columns):
+            t = QTransform()
+            if mirrored:
+                # Wektor wyciągnięcia (0, 0, -1) oznacza lustrzane odbicie względem osi Y
+                t.scale(-1, 1)
+            t.translate(ix, -iy)
+            t.rotate(-rotation)
+            # Odstępy tablicy są liczone w obróconym układzie wstawienia, bez skali
+            t.translate(column * column_spacing, -row * row_spacing)
+            t.scale(sx, sy)
+            transforms.append(t)
+    return transforms
+
+
+def add_arc(path, cx, cy, radius, start_angle, end_angle):
+    """Dodaje do ścieżki łuk ARC (kąty w stopniach, współrzędne DXF)."""
+    span = (end_angle - start_angle) % 360 or 360
+    rect = QRectF(cx - radius, -cy - radius, 2 * radius, 2 * radius)
+    # Kąty Qt są liczone przeciwnie do ruchu wskazówek zegara, tak jak w DXF
+    path.arcMoveTo(rect, start_angle)
+    path.arcTo(rect, start_angle, span)
+
+
+def add_entity_to_path(path, entity):
+    """Dodaje geometrię obiektu DXF do ścieżki; zwraca False dla nieobsługiwanych typów."""
+    dxftype = entity.dxftype()
+    if dxftype == 'LINE':
+        start, end = entity.dxf.start, entity.dxf.end
+        path.moveTo(start.x, -start.y)
+        path.lineTo(end.x, -end.y)
+    elif dxftype == 'CIRCLE':
+        center, radius = entity.dxf.center, entity.dxf.radius
+        path.addEllipse(QPointF(center.x, -center.y), radius, radius)
+    elif dxftype == 'ARC':
+        center = entity.dxf.center
+        add_arc(path, center.x, center.y, entity.dxf.radius, entity.dxf.start_angle, entity.dxf.end_angle)
+    elif dxftype == 'POLYLINE':
+        points = list(entity.points())
+        if points:
+            path.moveTo(points[0][0], -points[0][1])
+            for point in points[1:]:
+                path.lineTo(point[0], -point[1])
+    elif dxftype in ('LWPOLYLINE', 'SPLINE', 'ELLIPSE'):
+        # Bloki są współdzielone przez wystąpienia w różnej skali – stała tolerancja tesselacji
+        path.addPath(curve_from_entity(entity).path(FIXED_LEVEL))
+    else:
+        return False
+    return True
+
+
+def is_bending_line(entity):
+    return entity.dxftype() == 'LINE' and entity.dxf.get("color", 256) == BENDING_COLOR
+
+
+class BlockCache:
+    """Pamięć podręczna ścieżek i linii gięcia dla definicji bloków jednego dokumentu."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._blocks = {}  # Nazwa bloku -> (QPainterPath, lista QLineF linii gięcia)
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def get(self, name, depth=0):
+        """Zwraca (ścieżka, linie gięcia) bloku w jego lokalnym układzie (bez punktu bazowego)."""
+        if name in self._blocks:
+            return self._blocks[name]
+        path = QPainterPath()
+        bends = []
+        block = self.doc.blocks.get(name)
+        if block is None or depth > MAX_BLOCK_DEPTH:
+            logger.warning("Pominięto blok %s (brak definicji lub zbyt głębokie zagnieżdżenie)", name)
+            return path, bends
+
+        base = block.block.dxf.get("base_point", (0, 0, 0))
+        for entity in block:
+            if entity.dxftype() == 'INSERT':
+                child_path, child_bends = self.get(entity.dxf.name, depth + 1)
+                for transform in insert_transforms(entity):
+                    path.addPath(transform.map(child_path))
+                    bends.extend(transform.map(line) for line in child_bends)
+            elif is_bending_line(entity):
+                start, end = entity.dxf.start, entity.dxf.end
+                bends.append(QLineF(start.x, -start.y, end.x, -end.y))
+            elif not add_entity_to_path(path, entity):
+                stats.incr(f"dxf.unsupported.{entity.dxftype()}")
+
+        # Geometria bloku jest przesuwana tak, aby punkt bazowy był w (0, 0)
+        to_base = QTransform.fromTranslate(-base[0], base[1])
+        path = to_base.map(path)
+        bends = [to_base.map(line) for line in bends]
+        self._blocks[name] = (path, bends)
+        stats.incr("dxf.block_definitions")
+        return path, bends
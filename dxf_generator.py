@@ -0,0 +1,106 @@
+"""Generator syntetycznych plików DXF do testów wydajności.
+
+Przykład:
+    python dxf_generator.py synthetic.dxf --total 10000
+    python dxf_generator.py synthetic.dxf --lines 500 --arcs 100 --circles 50 --polylines 80 --bends 20
+"""
+
+import argparse
+import math
+import random
+
+import ezdxf
+
+BENDING_COLOR = 2
+CELL_SIZE = 20.0  # Rozmiar komórki siatki, w której umieszczany jest jeden obiekt
+
+# Udział typów obiektów przy generowaniu rysunku o zadanej łącznej liczbie obiektów
+DEFAULT_MIX = {
+    "lines": 0.40,
+    "arcs": 0.15,
+    "circles": 0.15,
+    "polylines": 0.20,
+    "bends": 0.10,
+}
+
+
+def counts_for_total(total, mix=DEFAULT_MIX):
+    """Rozdziela łączną liczbę obiektów między typy (co najmniej jedna linia gięcia)."""
+    counts = {name: int(total * share) for name, share in mix.items()}
+    counts["bends"] = max(counts["bends"], 1)
+    counts["lines"] += max(total - sum(counts.values()), 0)
+    return counts
+
+
+def generate_dxf(file_path, lines=0, arcs=0, circles=0, polylines=0, bends=0, seed=0):
+    """Zapisuje rysunek z podaną liczbą obiektów; zwraca słownik z liczbą obiektów każdego typu."""
+    rng = random.Random(seed)
+    doc = ezdxf.new("R2010")
+    msp = doc.modelspace()
+    total = lines + arcs + circles + polylines
+    columns = max(int(math.ceil(math.sqrt(max(total, 1)))), 1)
+    width = columns * CELL_SIZE
+
+    def cell(index):
+        row, column = divmod(index, columns)
+        return column * CELL_SIZE, row * CELL_SIZE
+
+    index = 0
+    for _ in range(lines):
+        x, y = cell(index)
+        msp.add_line((x + rng.uniform(0, 5), y + rng.uniform(0, 5)),
+                     (x + rng.uniform(10, 18), y + rng.uniform(10, 18)))
+        index += 1
+    for _ in range(arcs):
+        x, y = cell(index)
+        start = rng.uniform(0, 360)
+        msp.add_arc((x + 10, y + 10), rng.uniform(3, 9), start, start + rng.uniform(30, 300))
+        index += 1
+    for _ in range(circles):
+        x, y = cell(index)
+        msp.add_circle((x + 10, y + 10), rng.uniform(2, 9))
+        index += 1
+    for _ in range(polylines):
+        x, y = cell(index)
+        # Prostokąt z jednym zaokrąglonym narożnikiem (bulge) – typowy kontur wycięcia
+        points = [
+            (x + 2, y + 2, 0, 0, 0),
+            (x + 16, y + 2, 0, 0, rng.choice([0.0, 0.4142, -0.4142])),
+            (x + 18, y + 16, 0, 0, 0),
+            (x + 2, y + 18, 0, 0, rng.uniform(-1, 1)),
+        ]
+        msp.add_lwpolyline(points, format="xyseb", close=True)
+        index += 1
+
+    # Pionowe linie gięcia rozłożone na szerokości rysunku
+    height = (index // columns + 1) * CELL_SIZE
+    for i in range(bends):
+        x = width * (i + 1) / (bends + 1)
+        msp.add_line((x, -10), (x, height + 10), dxfattribs={"color": BENDING_COLOR})
+
+    doc.saveas(file_path)
+    return {"lines": lines, "arcs": arcs, "circles": circles, "polylines": polylines, "bends": bends}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator syntetycznych plików DXF.")
+    parser.add_argument("output")
+    parser.add_argument("--total", type=int, help="Łączna liczba obiektów (rozdzielana domyślnymi proporcjami).")
+    parser.add_argument("--lines", type=int, default=0)
+    parser.add_argument("--arcs", type=int, default=0)
+    parser.add_argument("--circles", type=int, default=0)
+    parser.add_argument("--polylines", type=int, default=0)
+    parser.add_argument("--bends", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.total is not None:
+        counts = counts_for_total(args.total)
+    else:
+        counts = {name: getattr(args, name) for name in DEFAULT_MIX}
+    result = generate_dxf(args.output, seed=args.seed, **counts)
+    print(f"Zapisano {args.output}: {result}")
+
+
+if __name__ == "__main__":
+    main()
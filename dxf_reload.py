@@ -0,0 +1,96 @@
+"""Przyrostowe przeładowanie rysunku DXF po zmianie pliku na dysku.
+
+Obiekty są porównywane po uchwycie DXF (handle) i sygnaturze geometrii – scena aktualizuje
+tylko obiekty dodane, usunięte i zmienione.
+"""
+
+import hashlib
+import os
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+RELOAD_DELAY_MS = 300  # Edytory CAD zapisują plik w kilku krokach – czekamy na koniec zapisu
+
+
+class SignatureBuilder:
+    """Wylicza sygnatury obiektów dokumentu (z pamięcią podręczną sygnatur bloków)."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._blocks = {}
+
+    def entity(self, entity):
+        """Zwraca skrót atrybutów i geometrii obiektu – zmienia się przy każdej edycji obiektu."""
+        attribs = entity.dxfattribs()
+        attribs.pop("handle", None)
+        parts = [entity.dxftype(), sorted((key, repr(value)) for key, value in attribs.items())]
+        dxftype = entity.dxftype()
+        if dxftype == 'LWPOLYLINE':
+            parts.append(list(entity.get_points('xyseb')))
+        elif dxftype == 'POLYLINE':
+            parts.append([(tuple(v.dxf.location), v.dxf.get("bulge", 0)) for v in entity.vertices])
+        elif dxftype == 'SPLINE':
+            parts.append([list(entity.control_points), list(entity.fit_points),
+                          list(entity.knots), list(entity.weights)])
+        elif dxftype == 'INSERT':
+            parts.append(self.block(entity.dxf.name))
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+    def block(self, name):
+        """Sygnatura definicji bloku – INSERT zmienia się także, gdy zmieni się zawartość bloku."""
+        if name in self._blocks:
+            return self._blocks[name]
+        self._blocks[name] = ""  # Ochrona przed cyklicznymi odwołaniami
+        block = self.doc.blocks.get(name)
+        if block is None:
+            return ""
+        digest = hashlib.sha1()
+        digest.update(repr(tuple(block.block.dxf.get("base_point", (0, 0, 0)))).encode("utf-8"))
+        for entity in block:
+            digest.update(self.entity(entity).encode("ascii"))
+        self._blocks[name] = digest.hexdigest()
+        return self._blocks[name]
+
+
+def diff_entities(old_signatures, new_signatures):
+    """Zwraca zbiory uchwytów (dodane, usunięte, zmienione) między dwiema wersjami rysunku."""
+    old_handles = set(old_signatures)
+    new_handles = set(new_signatures)
+    added = new_handles - old_handles
+    removed = old_handles - new_handles
+    changed = {h for h in old_handles & new_handles if old_signatures[h] != new_signatures[h]}
+    return added, removed, changed
+
+
+class DxfFileWatcher(QObject):
+    """Obserwuje otwarty plik DXF i zgłasza jego zmianę (z opóźnieniem na dokończenie zapisu)."""
+
+    file_changed = pyqtSignal(str)
+
+    def __init__(self, parent=None, delay_ms=RELOAD_DELAY_MS):
+        super().__init__(parent)
+        self.path = None
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._emit_change)
+
+    def watch(self, path):
+        if self._watcher.files():
+            self._watcher.removePaths(self._watcher.files())
+        self.path = path
+        if path:
+            self._watcher.addPath(path)
+
+    def _on_file_changed(self, path):
+        self._timer.start()
+
+    def _emit_change(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        # Zapis przez podmianę pliku usuwa go z listy obserwowanych – dodajemy go ponownie
+        if self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+        self.file_changed.emit(self.path)
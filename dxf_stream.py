@@ -0,0 +1,247 @@
+"""Odczyt plików DXF do zwartej geometrii (CompactGeometry) i jej pamięć podręczna.
+
+ezdxf.readfile buduje cały dokument (bloki, obiekty, wymiary, teksty). Dla dużych plików
+(rozkroje) czytamy tylko sekcję ENTITIES przez ezdxf.addons.iterdxf, filtrując typy
+rysowane przez przeglądarkę. Geometria trafia od razu do tablic (array('d')), a obiekty
+DXF są zwalniane po przetworzeniu. Rysunki z blokami (INSERT) wymagają pełnego dokumentu –
+wtedy zgłaszany jest StreamNotSupported i używany jest zwykły odczyt; wystąpienia bloków są
+zapisywane jako współdzielona ścieżka bloku z listą transformacji.
+
+CompactGeometry nie zawiera obiektów sceny, więc może być budowana w wątku roboczym
+i przechowywana dla nieaktywnych kart, a elementy sceny są tworzone dopiero przy wyświetleniu.
+"""
+
+import logging
+import os
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+from PyQt5.QtWidgets import QGraphicsLineItem, QGraphicsPathItem
+from PyQt5.QtGui import QPainterPath, QPen, QColor
+
+from instrumentation import stats
+from dxf_blocks import BlockCache, add_arc, insert_transforms, is_bending_line
+from dxf_reload import SignatureBuilder
+from dxf_tessellation import curve_from_entity, polyline_path
+
+logger = logging.getLogger(__name__)
+
+RENDERED_TYPES = ('LINE', 'CIRCLE', 'ARC', 'LWPOLYLINE', 'POLYLINE', 'SPLINE', 'ELLIPSE')
+STREAM_MIN_MB = float(os.getenv("LMDB_DXF_STREAM_MB", "20"))  # Mniejsze pliki czytamy w całości
+GEOMETRY_CACHE_SIZE = 32
+
+
+class StreamNotSupported(Exception):
+    """Plik wymaga pełnego dokumentu (np. zawiera bloki INSERT)."""
+
+
+def should_stream(file_path):
+    return os.path.getsize(file_path) >= STREAM_MIN_MB * 1024 * 1024
+
+
+class CompactGeometry:
+    """Geometria rysunku w zwartych tablicach (współrzędne DXF, bez odwracania osi Y)."""
+
+    def __init__(self):
+        self.lines = array('d')  # x1, y1, x2, y2
+        self.line_handles = []
+        self.bends = array('d')  # x1, y1, x2, y2 – linie gięcia (kolor 2)
+        self.bend_handles = []
+        self.circles = array('d')  # cx, cy, r
+        self.circle_handles = []
+        self.arcs = array('d')  # cx, cy, r, kąt początkowy, kąt końcowy
+        self.arc_handles = []
+        self.polylines = []  # (uchwyt, tablica punktów n×2)
+        self.curves = []  # (uchwyt, krzywa z dxf_tessellation)
+        self.inserts = []  # (uchwyt, ścieżka bloku, linie gięcia bloku, lista QTransform)
+        self.signatures = {}  # Uchwyt -> sygnatura (przyrostowe przeładowanie)
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def add(self, entity, signatures):
+        """Zapisuje geometrię obiektu; zwraca False dla typów, których nie rysujemy."""
+        dxftype = entity.dxftype()
+        handle = entity.dxf.handle
+        if dxftype == 'LINE':
+            start, end = entity.dxf.start, entity.dxf.end
+            if is_bending_line(entity):
+                self.bends.extend((start.x, start.y, end.x, end.y))
+                self.bend_handles.append(handle)
+            else:
+                self.lines.extend((start.x, start.y, end.x, end.y))
+                self.line_handles.append(handle)
+        elif dxftype == 'CIRCLE':
+            center = entity.dxf.center
+            self.circles.extend((center.x, center.y, entity.dxf.radius))
+            self.circle_handles.append(handle)
+        elif dxftype == 'ARC':
+            center = entity.dxf.center
+            self.arcs.extend((center.x, center.y, entity.dxf.radius, entity.dxf.start_angle, entity.dxf.end_angle))
+            self.arc_handles.append(handle)
+        elif dxftype == 'POLYLINE':
+            points = np.array([(p[0], p[1]) for p in entity.points()], dtype=float).reshape(-1, 2)
+            self.polylines.append((handle, points))
+        elif dxftype in ('LWPOLYLINE', 'SPLINE', 'ELLIPSE'):
+            self.curves.append((handle, curve_from_entity(entity)))
+        else:
+            stats.incr(f"dxf.unsupported.{dxftype}")
+            return False
+        self.signatures[handle] = signatures.entity(entity)
+        return True
+
+    @classmethod
+    def from_document(cls, doc):
+        """Buduje geometrię z pełnego dokumentu (obsługuje bloki INSERT)."""
+        geometry = cls()
+        signatures = SignatureBuilder(doc)
+        blocks = BlockCache(doc)  # Każda definicja bloku jest przetwarzana tylko raz
+        for entity in doc.modelspace():
+            if entity.dxftype() == 'INSERT':
+                path, bends = blocks.get(entity.dxf.name)
+                handle = entity.dxf.handle
+                geometry.inserts.append((handle, path, bends, insert_transforms(entity)))
+                geometry.signatures[handle] = signatures.entity(entity)
+            else:
+                geometry.add(entity, signatures)
+        return geometry
+
+    @staticmethod
+    def _rows(values, width):
+        return np.frombuffer(values, dtype=float).reshape(-1, width) if len(values) else np.zeros((0, width))
+
+    def add_to_scene(self, scene, curve_level, curve_items, handles=None):
+        """Tworzy elementy sceny (wszystkie lub tylko dla podanych uchwytów).
+
+        Krzywe są rejestrowane w curve_items (uchwyt -> [(element, krzywa)]) do zmiany
+        dokładności przy powiększaniu. Zwraca słownik uchwyt -> lista elementów.
+        """
+        items = {}
+
+        def wanted(handle):
+            return handles is None or handle in handles
+
+        def add(handle, item):
+            item.setData(2, handle)
+            items.setdefault(handle, []).append(item)
+
+        for handle, (x1, y1, x2, y2) in zip(self.line_handles, self._rows(self.lines, 4).tolist()):
+            if wanted(handle):
+                add(handle, scene.addLine(x1, -y1, x2, -y2))
+        bend_pen = QPen(QColor("yellow"))
+        for handle, (x1, y1, x2, y2) in zip(self.bend_handles, self._rows(self.bends, 4).tolist()):
+            if wanted(handle):
+                bending_line = QGraphicsLineItem(x1, -y1, x2, -y2)
+                bending_line.setPen(bend_pen)
+                bending_line.setData(0, "bending")
+                scene.addItem(bending_line)
+                add(handle, bending_line)
+        for handle, (cx, cy, r) in zip(self.circle_handles, self._rows(self.circles, 3).tolist()):
+            if wanted(handle):
+                add(handle, scene.addEllipse(cx - r, -cy - r, 2 * r, 2 * r))
+        for handle, (cx, cy, r, start, end) in zip(self.arc_handles, self._rows(self.arcs, 5).tolist()):
+            if wanted(handle):
+                path = QPainterPath()
+                add_arc(path, cx, cy, r, start, end)
+                add(handle, scene.addPath(path))
+        for handle, points in self.polylines:
+            if wanted(handle):
+                add(handle, scene.addPath(polyline_path(points)))
+        for handle, curve in self.curves:
+            if wanted(handle):
+                item = scene.addPath(curve.path(curve_level))
+                item.setData(3, curve_level)  # Poziom tesselacji (MainWindow.update_curve_detail)
+                curve_items.setdefault(handle, []).append((item, curve))
+                add(handle, item)
+        for handle, path, bends, transforms in self.inserts:
+            if not wanted(handle):
+                continue
+            bend_index = 0
+            for transform in transforms:
+                if not path.isEmpty():
+                    item = QGraphicsPathItem(path)
+                    item.setTransform(transform)
+                    scene.addItem(item)
+                    add(handle, item)
+                # Linie gięcia z bloków mają klucz "uchwyt:numer" – kolejne wystąpienia są rozróżnialne
+                for line in bends:
+                    bending_line = QGraphicsLineItem(transform.map(line))
+                    bending_line.setPen(bend_pen)
+                    bending_line.setData(0, "bending")
+                    scene.addItem(bending_line)
+                    add(handle, bending_line)
+                    bending_line.setData(2, f"{handle}:{bend_index}")
+                    bend_index += 1
+            stats.incr("dxf.block_instances", len(transforms))
+        stats.incr("dxf.scene_items", sum(len(v) for v in items.values()))
+        return items
+
+
+def read_compact(file_path):
+    """Czyta obiekty przestrzeni modelu strumieniowo do CompactGeometry."""
+    from ezdxf.addons import iterdxf
+
+    geometry = CompactGeometry()
+    signatures = SignatureBuilder(None)  # Sygnatury bez dokumentu – strumień nie zawiera bloków
+    with stats.timer("dxf.stream_read"):
+        for entity in iterdxf.modelspace(file_path, types=RENDERED_TYPES + ('INSERT',)):
+            if entity.dxftype() == 'INSERT':
+                raise StreamNotSupported(f"{file_path}: bloki INSERT wymagają pełnego odczytu")
+            geometry.add(entity, signatures)
+    stats.incr("dxf.stream_entities", len(geometry))
+    logger.info("Odczyt strumieniowy %s: %d obiektów", file_path, len(geometry))
+    return geometry
+
+
+def load_geometry(file_path):
+    """Wczytuje plik – strumieniowo, jeśli jest duży i nie zawiera bloków, w przeciwnym razie w całości."""
+    if should_stream(file_path):
+        try:
+            return read_compact(file_path)
+        except StreamNotSupported as e:
+            logger.info("%s – odczyt pełnego dokumentu", e)
+    import ezdxf
+    with stats.timer("dxf.document_read"):
+        doc = ezdxf.readfile(file_path)
+        return CompactGeometry.from_document(doc)
+
+
+class GeometryCache:
+    """Geometria ostatnio wczytanych plików (klucz: ścieżka, ważna do zmiany mtime/rozmiaru)."""
+
+    def __init__(self, max_size=GEOMETRY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # Ścieżka -> (mtime, rozmiar, geometria)
+
+    @staticmethod
+    def key(file_path):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_mtime, stat.st_size
+
+    def get(self, file_path):
+        path, mtime, size = self.key(file_path)
+        entry = self._entries.get(path)
+        if entry is None or entry[:2] != (mtime, size):
+            stats.incr("dxf.geometry_cache.miss")
+            return None
+        self._entries.move_to_end(path)
+        stats.incr("dxf.geometry_cache.hit")
+        return entry[2]
+
+    def put(self, file_path, geometry, key=None):
+        """Zapisuje geometrię; key – (ścieżka, mtime, rozmiar) odczytane przed parsowaniem."""
+        path, mtime, size = key or self.key(file_path)
+        self._entries[path] = (mtime, size, geometry)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def load(self, file_path):
+        """Zwraca geometrię z pamięci albo wczytuje plik."""
+        geometry = self.get(file_path)
+        if geometry is None:
+            key = self.key(file_path)
+            geometry = load_geometry(file_path)
+            self.put(file_path, geometry, key)
+        return geometry
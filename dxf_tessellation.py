@@ -0,0 +1,201 @@
+"""Adaptacyjna tesselacja krzywych DXF (LWPOLYLINE z łukami, ELLIPSE, SPLINE).
+
+Krzywe są zamieniane na łamane z dokładnością cięciwową (maksymalna odległość łamanej od
+krzywej) zależną od powiększenia widoku. Tolerancja jest kwantowana do potęg dwójki
+("poziomy"), dzięki czemu przy przybliżaniu krzywe są przeliczane tylko przy zmianie poziomu.
+Obiekt krzywej przechowuje łamane tylko dla MAX_CACHED_LEVELS ostatnio używanych poziomów
+(bieżący i poprzedni), żeby pamięć nie rosła z liczbą odwiedzonych powiększeń.
+Obliczenia punktów są wektorowe (numpy), bez pętli po segmentach.
+"""
+
+import math
+
+import numpy as np
+from PyQt5.QtCore import QPointF
+from PyQt5.QtGui import QPainterPath, QPolygonF
+
+from instrumentation import stats
+
+PIXEL_TOLERANCE = 0.25  # Dopuszczalne odchylenie łamanej od krzywej w pikselach ekranu
+MIN_LEVEL = -7  # ~0.008 mm – większa dokładność nie jest widoczna nawet przy dużym zoomie
+MAX_LEVEL = 3  # 8 mm
+FIXED_LEVEL = -4  # 0.0625 mm – dla geometrii bez widoku (bloki, miniatury)
+MAX_ARC_SEGMENTS = 4096
+MAX_CACHED_LEVELS = 2
+MIN_ARC_SEGMENTS_PER_TURN = 8
+SPLINE_MAX_POINTS = 20000
+SPLINE_MAX_REFINEMENTS = 16
+
+
+def tolerance_level(view_scale, pixel_tolerance=PIXEL_TOLERANCE):
+    """Poziom tolerancji (wykładnik potęgi dwójki w mm) dla skali widoku [piksele/mm]."""
+    tolerance = pixel_tolerance / max(abs(view_scale), 1e-12)
+    return int(min(max(math.floor(math.log2(tolerance)), MIN_LEVEL), MAX_LEVEL))
+
+
+def arc_segment_counts(radius, sweep, tolerance):
+    """Liczba odcinków łamanej dla łuków o podanych promieniach i kątach rozwarcia [rad]."""
+    radius = np.maximum(np.abs(radius), 1e-12)
+    ratio = np.clip(1.0 - tolerance / radius, -1.0, 1.0)
+    max_step = np.minimum(2.0 * np.arccos(ratio), 2.0 * np.pi / MIN_ARC_SEGMENTS_PER_TURN)
+    max_step = np.maximum(max_step, 1e-9)
+    return np.clip(np.ceil(np.abs(sweep) / max_step), 1, MAX_ARC_SEGMENTS).astype(int)
+
+
+def polyline_path(points):
+    """QPainterPath z łamanej w układzie DXF (oś Y odwrócona na potrzeby sceny)."""
+    path = QPainterPath()
+    if len(points):
+        path.addPolygon(QPolygonF([QPointF(x, -y) for x, y in points.tolist()]))
+    return path
+
+
+class Curve:
+    """Krzywa z cache łamanych dla kolejnych poziomów tolerancji."""
+
+    adaptive = True  # False – łamana nie zależy od tolerancji (np. polilinia bez łuków)
+
+    def __init__(self):
+        self._paths = {}
+
+    def tessellate(self, tolerance):
+        raise NotImplementedError
+
+    def path(self, level):
+        if not self.adaptive:
+            level = None
+        path = self._paths.pop(level, None)
+        if path is None:
+            with stats.timer("dxf.tessellate"):
+                points = self.tessellate(2.0 ** (FIXED_LEVEL if level is None else level))
+                path = polyline_path(points)
+            stats.observe("dxf.tessellate_points", len(points))
+        self._paths[level] = path  # Słownik zachowuje kolejność – ostatnio użyty poziom na końcu
+        while len(self._paths) > MAX_CACHED_LEVELS:
+            del self._paths[next(iter(self._paths))]
+        return path
+
+
+class BulgePolyline(Curve):
+    """Polilinia z segmentami łukowymi (bulge)."""
+
+    def __init__(self, xy, bulges, closed):
+        super().__init__()
+        self.xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        self.bulges = np.asarray(bulges, dtype=float)
+        self.closed = bool(closed)
+        self.adaptive = bool(np.any(self.bulges != 0))
+
+    def tessellate(self, tolerance):
+        n = len(self.xy)
+        if n < 2:
+            return self.xy
+        # Zamknięta polilinia ma dodatkowy segment od ostatniego do pierwszego wierzchołka
+        m = n if self.closed else n - 1
+        start = self.xy[:m]
+        end = self.xy[np.arange(1, m + 1) % n]
+        bulge = self.bulges[:m]
+        delta = end - start
+        chord = np.hypot(delta[:, 0], delta[:, 1])
+        is_arc = (bulge != 0) & (chord > 0)
+
+        safe_bulge = np.where(is_arc, bulge, 1.0)
+        safe_chord = np.where(is_arc, chord, 1.0)
+        theta = np.where(is_arc, 4.0 * np.arctan(bulge), 0.0)
+        half_sin = np.where(is_arc, np.abs(np.sin(theta / 2.0)), 1.0)
+        radius = np.where(is_arc, safe_chord / (2.0 * half_sin), 0.0)
+        # Środek łuku leży na symetralnej cięciwy, po stronie wynikającej ze znaku bulge
+        offset = safe_chord * (1.0 - safe_bulge ** 2) / (4.0 * safe_bulge)
+        center = (start + end) / 2.0 + (offset / safe_chord)[:, None] * np.column_stack([-delta[:, 1], delta[:, 0]])
+        start_angle = np.arctan2(start[:, 1] - center[:, 1], start[:, 0] - center[:, 0])
+
+        steps = np.where(is_arc, arc_segment_counts(radius, theta, tolerance), 1)
+        segment = np.repeat(np.arange(m), steps)
+        first = np.cumsum(steps) - steps
+        fraction = (np.arange(len(segment)) - first[segment]) / steps[segment]
+
+        points = start[segment] + fraction[:, None] * delta[segment]
+        arc_points = is_arc[segment]
+        if arc_points.any():
+            angle = start_angle[segment][arc_points] + fraction[arc_points] * theta[segment][arc_points]
+            r = radius[segment][arc_points]
+            c = center[segment][arc_points]
+            points[arc_points] = c + r[:, None] * np.column_stack([np.cos(angle), np.sin(angle)])
+        return np.vstack([points, end[-1:]])
+
+
+class EllipseCurve(Curve):
+    """Elipsa lub łuk eliptyczny (ELLIPSE)."""
+
+    def __init__(self, center, major_axis, ratio, start_param, end_param):
+        super().__init__()
+        self.center = np.array([center[0], center[1]], dtype=float)
+        self.major = np.array([major_axis[0], major_axis[1]], dtype=float)
+        self.ratio = float(ratio)
+        self.start_param = float(start_param)
+        self.sweep = (float(end_param) - self.start_param) % (2 * math.pi) or 2 * math.pi
+
+    def tessellate(self, tolerance):
+        a = float(np.hypot(*self.major))
+        # Elipsa jest obrazem okręgu o promieniu a (ściśniętym), więc błąd cięciwy nie przekracza
+        # błędu dla okręgu o tym promieniu przy tym samym kroku parametru
+        count = int(arc_segment_counts(a, self.sweep, tolerance))
+        t = self.start_param + np.linspace(0.0, self.sweep, count + 1)
+        minor = self.ratio * np.array([-self.major[1], self.major[0]])
+        return self.center + np.outer(np.cos(t), self.major) + np.outer(np.sin(t), minor)
+
+
+class SplineCurve(Curve):
+    """Krzywa B-spline (SPLINE) dzielona adaptacyjnie do osiągnięcia tolerancji."""
+
+    def __init__(self, bspline):
+        super().__init__()
+        self.bspline = bspline
+
+    def _evaluate(self, params):
+        return np.array([(p.x, p.y) for p in self.bspline.points(params.tolist())], dtype=float).reshape(-1, 2)
+
+    def tessellate(self, tolerance):
+        count = max(8, 4 * self.bspline.count)
+        params = np.linspace(0.0, self.bspline.max_t, count)
+        points = self._evaluate(params)
+        pending = np.ones(count - 1, dtype=bool)  # Przedziały, których błąd nie był jeszcze sprawdzony
+        for _ in range(SPLINE_MAX_REFINEMENTS):
+            spans = np.flatnonzero(pending)
+            if len(spans) == 0:
+                break
+            mid_params = (params[spans] + params[spans + 1]) / 2.0
+            mid_points = self._evaluate(mid_params)
+            # Odległość punktu środkowego przedziału od cięciwy przybliża błąd łamanej
+            a, b = points[spans], points[spans + 1]
+            ab = b - a
+            length = np.hypot(ab[:, 0], ab[:, 1])
+            cross = np.abs(ab[:, 0] * (mid_points[:, 1] - a[:, 1]) - ab[:, 1] * (mid_points[:, 0] - a[:, 0]))
+            deviation = np.where(length > 0, cross / np.where(length > 0, length, 1.0),
+                                 np.hypot(*(mid_points - a).T))
+            too_far = deviation > tolerance
+            split = spans[too_far]
+            if len(split) == 0 or len(params) + len(split) > SPLINE_MAX_POINTS:
+                break
+            params = np.insert(params, split + 1, mid_params[too_far])
+            points = np.insert(points, split + 1, mid_points[too_far], axis=0)
+            # Obie połówki podzielonego przedziału są sprawdzane w kolejnym kroku, pozostałe już nie
+            is_split = np.zeros(len(pending), dtype=bool)
+            is_split[split] = True
+            pending = np.repeat(is_split, np.where(is_split, 2, 1))
+        return points
+
+
+def curve_from_entity(entity):
+    """Tworzy krzywą dla LWPOLYLINE, ELLIPSE lub SPLINE; None dla pozostałych typów."""
+    dxftype = entity.dxftype()
+    if dxftype == 'LWPOLYLINE':
+        points = np.array(list(entity.get_points('xyb')), dtype=float).reshape(-1, 3)
+        return BulgePolyline(points[:, :2], points[:, 2], entity.closed)
+    if dxftype == 'ELLIPSE':
+        dxf = entity.dxf
+        return EllipseCurve(dxf.center, dxf.major_axis, dxf.ratio,
+                            dxf.get("start_param", 0.0), dxf.get("end_param", 2 * math.pi))
+    if dxftype == 'SPLINE':
+        return SplineCurve(entity.construction_tool())
+    return None
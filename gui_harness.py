@@ -0,0 +1,75 @@
+"""Pomocnicze funkcje do sterowania MainWindow bez operatora (benchmark, odtwarzanie sesji).
+
+Okna komunikatów QMessageBox są modalne – w trybie offscreen nikt ich nie zamknie, więc
+MessageBoxGuard zastępuje je na czas pomiaru zapisem komunikatu (i opcjonalnie wyjątkiem).
+"""
+
+import logging
+import subprocess
+
+from PyQt5.QtWidgets import QMessageBox
+from PyQt5.QtCore import Qt, QEvent, QPointF
+from PyQt5.QtGui import QMouseEvent
+
+logger = logging.getLogger(__name__)
+
+PATCHED_BOXES = ("warning", "critical", "information", "question")
+
+
+def git_revision():
+    """Skrót bieżącego commita (None poza repozytorium git)."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def click(view, scene_point):
+    """Symuluje kliknięcie lewym przyciskiem w punkcie sceny."""
+    view_point = QPointF(view.mapFromScene(scene_point))
+    press = QMouseEvent(QEvent.MouseButtonPress, view_point, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+    release = QMouseEvent(QEvent.MouseButtonRelease, view_point, Qt.LeftButton, Qt.NoButton, Qt.NoModifier)
+    view.mousePressEvent(press)
+    view.mouseReleaseEvent(release)
+
+
+class MessageBoxError(RuntimeError):
+    """Aplikacja wyświetliłaby okno błędu (warning/critical)."""
+
+
+class MessageBoxGuard:
+    """Kontekst zastępujący modalne QMessageBox; komunikaty trafiają do listy messages.
+
+    raise_errors – okna warning/critical zgłaszają MessageBoxError zamiast zwracać sterowanie.
+    """
+
+    def __init__(self, raise_errors=False):
+        self.raise_errors = raise_errors
+        self.messages = []  # (rodzaj, tytuł, treść)
+        self._originals = {}
+
+    def _replacement(self, kind):
+        def show(parent, title, text, *args, **kwargs):
+            self.messages.append((kind, title, text))
+            logger.info("Pominięto okno %s: %s – %s", kind, title, text)
+            if kind in ("warning", "critical") and self.raise_errors:
+                raise MessageBoxError(f"{title}: {text}")
+            return QMessageBox.No if kind == "question" else QMessageBox.Ok
+        return staticmethod(show)
+
+    @property
+    def errors(self):
+        return [message for message in self.messages if message[0] in ("warning", "critical")]
+
+    def __enter__(self):
+        for kind in PATCHED_BOXES:
+            self._originals[kind] = getattr(QMessageBox, kind)
+            setattr(QMessageBox, kind, self._replacement(kind))
+        return self
+
+    def __exit__(self, *exc):
+        for kind, original in self._originals.items():
+            setattr(QMessageBox, kind, original)
+        self._originals = {}
+        return False
@@ -0,0 +1,177 @@
+"""Logowanie oraz liczniki wydajności dla gorących ścieżek aplikacji.
+
+Przykład:
+    from instrumentation import stats
+
+    with stats.timer("bd.predict"):
+        ...
+    stats.incr("dxf.entities", 120)
+    stats.observe("dxf.file_size_kb", 532)
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+LOG_LEVEL_ENV = "LMDB_LOG_LEVEL"
+PROFILE_DIR = "profiles"
+HISTOGRAM_SAMPLES = 1024  # Liczba ostatnich próbek trzymanych do wyliczania percentyli
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(level=None):
+    """Konfiguruje logowanie aplikacji; poziom można nadpisać zmienną LMDB_LOG_LEVEL."""
+    level = level or os.getenv(LOG_LEVEL_ENV, "INFO")
+    if isinstance(level, str):
+        level = getattr(logging, level.upper(), logging.INFO)
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    logging.getLogger().setLevel(level)
+
+
+class Histogram:
+    """Rozkład wartości: liczba, suma, min/max oraz percentyle z ostatnich próbek."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.samples = deque(maxlen=HISTOGRAM_SAMPLES)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.samples.append(value)
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(round(q / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class Stats:
+    """Rejestr liczników, czasomierzy i histogramów (bezpieczny wątkowo)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timers = {}  # Nazwa -> Histogram czasów w milisekundach
+        self.histograms = {}
+        self._profile_requests = set()
+        self.last_profile = None  # Ścieżka ostatnio zapisanego profilu
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).add(value)
+
+    def record_time(self, name, elapsed_ms):
+        with self._lock:
+            self.timers.setdefault(name, Histogram()).add(elapsed_ms)
+
+    @contextmanager
+    def timer(self, name):
+        """Mierzy czas bloku; jeśli zażądano profilu dla tej operacji, uruchamia cProfile."""
+        profiler = None
+        if name in self._profile_requests:
+            with self._lock:
+                if name in self._profile_requests:
+                    self._profile_requests.discard(name)
+                    profiler = cProfile.Profile()
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.record_time(name, (time.perf_counter() - start) * 1000.0)
+            if profiler is not None:
+                self._save_profile(name, profiler)
+
+    def timed(self, name):
+        """Dekorator mierzący czas wywołania funkcji."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def profile_next(self, name):
+        """Włącza jednorazowy zapis profilu cProfile dla następnego wywołania operacji."""
+        with self._lock:
+            self._profile_requests.add(name)
+        logger.info("Profil cProfile zostanie zapisany przy następnym wywołaniu: %s", name)
+
+    def pending_profiles(self):
+        with self._lock:
+            return sorted(self._profile_requests)
+
+    def _save_profile(self, name, profiler):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        profiler.dump_stats(base + ".prof")
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+        with open(base + ".txt", "w", encoding="utf-8") as file:
+            file.write(summary.getvalue())
+        self.last_profile = base + ".prof"
+        logger.info("Zapisano profil operacji %s: %s", name, self.last_profile)
+
+    def names(self):
+        with self._lock:
+            return sorted(set(self.timers) | set(self.histograms) | set(self.counters))
+
+    def snapshot(self):
+        """Zwraca bieżący stan wszystkich metryk jako słownik."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timers_ms": {name: h.as_dict() for name, h in self.timers.items()},
+                "histograms": {name: h.as_dict() for name, h in self.histograms.items()},
+            }
+
+    def export_json(self, file_path):
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=4)
+        logger.info("Wyeksportowano statystyki do: %s", file_path)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+            self.histograms.clear()
+
+
+stats = Stats()
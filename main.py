@@ -1,40 +1,76 @@
-from PyQt5.QtWidgets import QApplication
-from ui_main import MainWindow
-from data_loader import load_data
-from model_utils import BDModel
-from matrix_config_editor import MatrixConfigEditor
-from data_editor import DataEditorDialog
+import logging
+import os
+
+from startup_timer import StartupTimer
+from instrumentation import setup_logging
+
+startup_timer = StartupTimer()
+setup_logging()
+logger = logging.getLogger(__name__)
+
+with startup_timer.phase("Import PyQt5"):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+
+with startup_timer.phase("Import ui_main"):
+    from ui_main import MainWindow, CustomGraphicsView
+    from ui_watchdog import install_watchdog, instrument_class
 
-if __name__ == "__main__":
-    app = QApplication([])
 
-    # Inicjalizacja modelu
-    model = BDModel()
+def finish_startup(window):
+    """Wczytuje dane i modele po pierwszym narysowaniu okna."""
+    with startup_timer.phase("Import data_loader (pandas)"):
+        from data_loader import load_data
 
     # Wczytanie danych
-    data = load_data()
+    with startup_timer.phase("Wczytanie danych"):
+        data = load_data()
+
+    with startup_timer.phase("Import model_utils"):
+        from model_utils import BDModel
 
     # Próba wczytania lub przetrenowania modeli
-    print("Próba wczytania istniejących modeli...")
-    model.train_models(data, force_retrain=False)  # force_retrain=False oznacza brak wymuszania treningu
+    with startup_timer.phase("Wczytanie modeli (xgboost)"):
+        model = BDModel()
+        logger.info("Próba wczytania istniejących modeli...")
+        model.train_models(data, force_retrain=False)  # force_retrain=False oznacza brak wymuszania treningu
+
+    # Przekazanie danych i modelu do okna oraz wypełnienie list rozwijanych
+    with startup_timer.phase("Wypełnienie list rozwijanych"):
+        window.set_backend(data, model)
+
+    logger.info("%s", startup_timer.report())
 
-    # Przygotowanie wartości dla MatrixConfigEditor
-    grubosci = sorted(data['Grubosc'].unique())  # Pobierz unikalne grubości materiału
-    matryce = sorted(set(data['V'].unique()))  # Pobierz unikalne szerokości matryc
 
-    # Inicjalizacja MatrixConfigEditor
-    matrix_config_editor = MatrixConfigEditor(grubosci, matryce)
+if __name__ == "__main__":
+    with startup_timer.phase("QApplication"):
+        app = QApplication([])
+
+    # Watchdog pętli zdarzeń i pomiar czasu slotów (wyłączenie: LMDB_WATCHDOG=0)
+    if os.getenv("LMDB_WATCHDOG", "1") != "0":
+        install_watchdog()
+        instrument_class(MainWindow)
+        instrument_class(CustomGraphicsView)
 
-    # Inicjalizacja DataEditorDialog
-    data_editor = DataEditorDialog(data)
+    # Okno jest tworzone bez danych – dialogi MatrixConfigEditor i DataEditorDialog
+    # powstają dopiero przy pierwszym otwarciu
+    with startup_timer.phase("Utworzenie MainWindow"):
+        window = MainWindow(None, None)
 
-    # Inicjalizacja głównego okna z dodatkiem DXF
-    window = MainWindow(data, model, matrix_config_editor, data_editor)
+    # Nagrywanie sesji operatora do odtwarzania w testach opóźnień (LMDB_SESSION_LOG)
+    from session_recorder import session_log_path
+    if session_log_path():
+        from session_recorder import SessionRecorder
+        instrument_class(SessionRecorder)  # Przed podłączeniem slotów w __init__
+        session_recorder = SessionRecorder(window, session_log_path())
+        app.aboutToQuit.connect(session_recorder.close)
 
-    # Wywołanie metody, która wypełnia listy rozwijane
-    window.populate_comboboxes()
+    # Uruchomienie głównego okna i pierwsze malowanie
+    with startup_timer.phase("Pierwsze malowanie okna"):
+        window.show()
+        app.processEvents()
 
-    # Uruchomienie głównego okna
-    window.show()
+    # Ciężkie moduły i dane wczytujemy po narysowaniu okna
+    QTimer.singleShot(0, lambda: finish_startup(window))
 
     app.exec_()
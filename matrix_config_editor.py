@@ -1,6 +1,9 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QMessageBox
 from PyQt5.QtCore import Qt
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 CONFIG_FILE = "matrix_config.json"
 
@@ -13,7 +16,7 @@ def load_matrix_config():
     except FileNotFoundError:
         return {}
     except json.JSONDecodeError as e:
-        print(f"Błąd wczytywania konfiguracji matryc: {e}")
+        logger.error("Błąd wczytywania konfiguracji matryc: %s", e)
         return {}
 
 
@@ -22,13 +25,16 @@ def save_matrix_config(config):
     try:
         with open(CONFIG_FILE, "w") as file:
             json.dump(config, file, indent=4)
-            print(f"Zapisano konfigurację matryc w {CONFIG_FILE}")
+            logger.info("Zapisano konfigurację matryc w %s", CONFIG_FILE)
     except Exception as e:
-        print(f"Błąd zapisu konfiguracji matryc: {e}")
+        logger.error("Błąd zapisu konfiguracji matryc: %s", e)
 
 
 class MatrixConfigEditor(QDialog):
     """Okno przypisywania matryc do grubości materiału."""
+    # Sloty mierzone przez watchdog UI (ui_watchdog.instrument_class)
+    TIMED_SLOTS = ("save_config",)
+
     def __init__(self, grubosci, matryce, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Przypisz Matryce")
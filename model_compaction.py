@@ -0,0 +1,273 @@
+"""Kompaktowanie modeli BD: najmniejszy zespół drzew mieszczący się w budżecie błędu.
+
+Modele CZ i N są trenowane ze stałymi 200 drzewami o głębokości 5. Dla każdego materiału
+sprawdzane są prefiksy zespołu (predict z iteration_range=(0, k)) bez ponownego treningu;
+k jest szukany binarnie (ok. log2(200) predykcji tabeli treningowej). Wybierany jest k, dla którego
+RMSE na tabeli treningowej nie przekracza RMSE pełnego modelu o więcej niż zadaną tolerancję
+(względną i bezwzględną), a maksymalny błąd – o więcej niż tolerancję bezwzględną.
+Opcjonalnie (--depths) trenowane są zespoły płytszych drzew i wybierany jest kandydat
+o najmniejszym rozmiarze pliku. Zwarty model to booster dopasowanego modelu przycięty do
+pierwszych k drzew; przed zapisem jest ponownie sprawdzany względem budżetu błędu.
+
+Zwarty model zastępuje plik w models/ (pełny zostaje w kopii *.full.joblib), dzięki czemu
+BDModel, usługa HTTP i eksport tabel używają go bez zmian. Raport zawiera rozmiar pliku,
+a przy uruchomieniu z wiersza poleceń również czas wczytania i opóźnienie predykcji
+(pojedyncze gięcie i cała tabela) przed i po.
+
+Przykład:
+    python model_compaction.py --rel-tol 0.02 --abs-tol 0.005 --depths 3 4
+    python model_compaction.py --dry-run
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from instrumentation import stats
+
+logger = logging.getLogger(__name__)
+
+TARGET_COLUMNS = {"CZ": "BD_CZ", "N": "BD_N"}
+FEATURES = ['Grubosc', 'V', 'Kat']
+DEFAULT_REL_TOL = 0.02  # Dopuszczalny względny wzrost RMSE względem pełnego modelu
+DEFAULT_ABS_TOL = 0.005  # [mm] – zapas dla modeli, które niemal idealnie odwzorowują dane
+TIMING_REPEATS = 20
+FULL_SUFFIX = ".full.joblib"
+
+
+def training_table(data, material):
+    """Cechy i wartości docelowe materiału (wiersze z brakami są pomijane)."""
+    column = TARGET_COLUMNS[material]
+    data = data.dropna(subset=FEATURES + [column])
+    return data[FEATURES].astype(float), data[column].to_numpy(dtype=float)
+
+
+def errors(predicted, y):
+    residual = predicted - y
+    return float(np.sqrt(np.mean(residual ** 2))), float(np.max(np.abs(residual)))
+
+
+def error_budget(full_rmse, full_max, rel_tol, abs_tol):
+    """Maksymalne RMSE i maksymalny błąd dopuszczalne dla zwartego modelu."""
+    return full_rmse * (1.0 + rel_tol) + abs_tol, full_max + abs_tol
+
+
+def n_trees(model):
+    return model.get_booster().num_boosted_rounds()
+
+
+def minimal_prefix(model, X, y, budget):
+    """Najmniejsza liczba pierwszych drzew zespołu mieszcząca się w budżecie błędu.
+
+    Wyszukiwanie binarne zakłada, że błąd maleje wraz z liczbą drzew; przy niemonotonicznym
+    błędzie wynik może nie być najmniejszy, ale zawsze mieści się w budżecie.
+    Zwraca (k, rmse, max_error); gdy żaden prefiks nie spełnia budżetu – pełny zespół.
+    """
+    total = n_trees(model)
+    low, high = 1, total
+    found = None
+    with stats.timer("compaction.prefix_search"):
+        while low < high:
+            k = (low + high) // 2
+            rmse, worst = errors(model.predict(X, iteration_range=(0, k)), y)
+            if within_budget(rmse, worst, budget):
+                found = (k, rmse, worst)
+                high = k
+            else:
+                low = k + 1
+    if found is not None:
+        return found  # found[0] == high == low
+    return (total,) + errors(model.predict(X), y)
+
+
+def train_candidate(model, X, y, n_estimators, max_depth):
+    """Trenuje model o parametrach pełnego modelu z podaną liczbą i głębokością drzew."""
+    from xgboost import XGBRegressor
+    params = model.get_params()
+    params.update(n_estimators=n_estimators, max_depth=max_depth)
+    candidate = XGBRegressor(**params)
+    with stats.timer("compaction.train"):
+        candidate.fit(X, y)
+    return candidate
+
+
+def prefix_model(model, k):
+    """Regresor z pierwszymi k drzewami dopasowanego modelu (bez ponownego treningu)."""
+    from xgboost import XGBRegressor
+    raw = model.get_booster()[:k].save_raw()
+    compact = XGBRegressor(**model.get_params())
+    compact.load_model(bytearray(raw))
+    compact.set_params(n_estimators=k)
+    return compact
+
+
+def dumped_size(model):
+    """Rozmiar pliku joblib modelu [B]."""
+    import joblib
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "model.joblib")
+        joblib.dump(model, path)
+        return os.path.getsize(path)
+
+
+def within_budget(rmse, worst, budget):
+    return rmse <= budget[0] and worst <= budget[1]
+
+
+def compact_model(model, X, y, rel_tol=DEFAULT_REL_TOL, abs_tol=DEFAULT_ABS_TOL, depths=()):
+    """Wybiera najmniejszy model w budżecie błędu; zwraca (model, opis wyboru).
+
+    Gdy żaden przycięty model nie mieści się w budżecie, zwracany jest pełny model.
+    """
+    full_rmse, full_max = errors(model.predict(X), y)
+    budget = error_budget(full_rmse, full_max, rel_tol, abs_tol)
+    full_depth = model.get_params().get("max_depth")
+    sources = [(full_depth, model)]
+    for depth in sorted(set(depths)):
+        if full_depth is None or depth < full_depth:
+            sources.append((depth, train_candidate(model, X, y, n_trees(model), depth)))
+
+    best = None
+    for depth, source in sources:
+        k, _, _ = minimal_prefix(source, X, y, budget)
+        compact = prefix_model(source, k)
+        # Ocena zapisywanego modelu, a nie prefiksu – to on trafia do models/
+        rmse, worst = errors(compact.predict(X), y)
+        if not within_budget(rmse, worst, budget):
+            logger.info("Model o %d drzewach (głębokość %s) nie mieści się w budżecie błędu "
+                        "(RMSE %.4f, maks. %.4f)", k, depth, rmse, worst)
+            continue
+        size = dumped_size(compact)
+        if best is None or size < best[1]["size"]:
+            best = (compact, {"trees": k, "depth": depth, "rmse": rmse, "max_error": worst, "size": size})
+    if best is None:
+        logger.warning("Żaden zwarty model nie mieści się w budżecie błędu – pozostaje pełny model")
+        best = (model, {"trees": n_trees(model), "depth": full_depth, "rmse": full_rmse,
+                        "max_error": full_max, "size": dumped_size(model)})
+    compact, info = best
+    info.update(full_trees=n_trees(model), full_depth=full_depth, full_rmse=full_rmse, full_max_error=full_max,
+                budget_rmse=budget[0], budget_max_error=budget[1])
+    return compact, info
+
+
+def _median_time(function, repeats=TIMING_REPEATS):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def measure(model_path, X):
+    """Rozmiar pliku [B], czas wczytania [s] oraz opóźnienie predykcji jednego wiersza i tabeli [s]."""
+    import joblib
+    model = joblib.load(model_path)
+    single = X.iloc[:1]
+    return {
+        "size": os.path.getsize(model_path),
+        "load": _median_time(lambda: joblib.load(model_path), repeats=5),
+        "predict_single": _median_time(lambda: model.predict(single)),
+        "predict_table": _median_time(lambda: model.predict(X)),
+    }
+
+
+def full_model_path(model_path):
+    return model_path[:-len(".joblib")] + FULL_SUFFIX
+
+
+def measure_size(model_path, X):
+    """Tylko rozmiar pliku [B] – bez pomiarów czasu."""
+    return {"size": os.path.getsize(model_path)}
+
+
+def compact_models(bd_model, data, rel_tol=DEFAULT_REL_TOL, abs_tol=DEFAULT_ABS_TOL, depths=(), dry_run=False,
+                   measure_timings=True):
+    """Kompaktuje modele CZ i N modelu BDModel; zwraca raport materiał -> wybór i pomiary.
+
+    Punktem odniesienia jest zawsze pełny model (kopia *.full.joblib, jeśli istnieje), więc
+    ponowne uruchomienie z inną tolerancją nie kumuluje błędu kolejnych kompaktowań.
+    measure_timings=False pomija pomiary czasu wczytania i predykcji (kompaktowanie po
+    treningu w aplikacji) – raport zawiera wtedy tylko rozmiary plików.
+    """
+    import joblib
+    measure_model = measure if measure_timings else measure_size
+    report = {}
+    paths = {"CZ": bd_model.model_path_CZ, "N": bd_model.model_path_N}
+    for material, path in paths.items():
+        X, y = training_table(data, material)
+        full_path = full_model_path(path)
+        reference_path = full_path if os.path.exists(full_path) else path
+        model = joblib.load(reference_path)
+        compact, info = compact_model(model, X, y, rel_tol, abs_tol, depths)
+        info["before"] = measure_model(reference_path, X)
+        if dry_run:
+            with tempfile.TemporaryDirectory() as folder:
+                compact_path = os.path.join(folder, os.path.basename(path))
+                joblib.dump(compact, compact_path)
+                info["after"] = measure_model(compact_path, X)
+        else:
+            if reference_path == path:
+                shutil.copy2(path, full_path)
+            joblib.dump(compact, path)
+            info["after"] = measure_model(path, X)
+            logger.info("Zapisano zwarty model %s (%d drzew, głębokość %s); pełny model: %s",
+                        path, info["trees"], info["depth"], full_path)
+        report[material] = info
+    if not dry_run:
+        bd_model.reload_models()
+    return report
+
+
+def format_report(report):
+    lines = []
+    for material, info in report.items():
+        before, after = info["before"], info["after"]
+        lines.append(
+            f"{material}: {info['full_trees']} drzew (gł. {info['full_depth']}) -> {info['trees']} drzew "
+            f"(gł. {info['depth']})\n"
+            f"  RMSE {info['full_rmse']:.4f} -> {info['rmse']:.4f} mm (budżet {info['budget_rmse']:.4f}), "
+            f"maks. błąd {info['full_max_error']:.4f} -> {info['max_error']:.4f} mm "
+            f"(budżet {info['budget_max_error']:.4f})"
+        )
+        for key, label, scale, unit in (("size", "Rozmiar", 1 / 1024, "KiB"), ("load", "Wczytanie", 1000, "ms"),
+                                        ("predict_single", "Predykcja 1 gięcia", 1000, "ms"),
+                                        ("predict_table", "Predykcja tabeli", 1000, "ms")):
+            if key not in before or key not in after:
+                continue
+            saved = 1.0 - after[key] / before[key] if before[key] else 0.0
+            lines.append(f"  {label:<20} {before[key] * scale:10.3f} -> {after[key] * scale:10.3f} {unit} "
+                         f"({saved:.0%} mniej)")
+    return "\n".join(lines)
+
+
+def main():
+    from data_loader import load_data
+    from model_utils import BDModel
+
+    parser = argparse.ArgumentParser(description="Kompaktowanie modeli BD (mniej drzew w budżecie błędu).")
+    parser.add_argument("--rel-tol", type=float, default=DEFAULT_REL_TOL,
+                        help="Dopuszczalny względny wzrost RMSE względem pełnego modelu.")
+    parser.add_argument("--abs-tol", type=float, default=DEFAULT_ABS_TOL,
+                        help="Dopuszczalny bezwzględny wzrost RMSE i maksymalnego błędu [mm].")
+    parser.add_argument("--depths", type=int, nargs="*", default=[],
+                        help="Sprawdź również zespoły płytszych drzew o podanych głębokościach.")
+    parser.add_argument("--dry-run", action="store_true", help="Tylko raport, bez zapisu modeli.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    data = load_data()
+    model = BDModel()
+    model.reload_models()
+    report = compact_models(model, data, args.rel_tol, args.abs_tol, args.depths, args.dry_run)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 import os
-import pandas as pd
-import joblib
-from xgboost import XGBRegressor
+import hashlib
+import logging
 import time
 
+from audit_log import audit
+from instrumentation import stats
+
+# pandas, numpy, joblib i xgboost są importowane przy pierwszym użyciu,
+# żeby nie wydłużać startu aplikacji.
+
+logger = logging.getLogger(__name__)
+
 
 class BDModel:
     def __init__(self):
@@ -11,11 +18,13 @@ class BDModel:
         self.model_N = None
         self.model_path_CZ = "models/model_CZ_from_excel.joblib"
         self.model_path_N = "models/model_N_from_excel.joblib"
+        self.fingerprint = None  # Skrót plików modeli – identyfikuje wersję modelu
 
     def train_models(self, data, force_retrain=False):
         """Trenuje modele dla materiałów CZ i N."""
-        print("Rozpoczęcie procesu zarządzania modelami.")
-        print(f"Ścieżki zapisów: {self.model_path_CZ}, {self.model_path_N}")
+        logger.info("Rozpoczęcie procesu zarządzania modelami.")
+        logger.debug("Ścieżki zapisów: %s, %s", self.model_path_CZ, self.model_path_N)
+        import joblib
 
         # Przygotowanie danych
         X = data[['Grubosc', 'V', 'Kat']]
@@ -25,55 +34,122 @@ class BDModel:
         # Wczytaj istniejące modele, jeśli nie wymuszamy treningu
         if not force_retrain and os.path.exists(self.model_path_CZ) and os.path.exists(self.model_path_N):
             try:
-                print("Wczytywanie zapisanych modeli...")
+                logger.info("Wczytywanie zapisanych modeli...")
                 self.model_CZ = joblib.load(self.model_path_CZ)
                 self.model_N = joblib.load(self.model_path_N)
-                print(f"Data modyfikacji modelu CZ: {time.ctime(os.path.getmtime(self.model_path_CZ))}")
-                print(f"Data modyfikacji modelu N: {time.ctime(os.path.getmtime(self.model_path_N))}")
+                logger.info("Data modyfikacji modelu CZ: %s", time.ctime(os.path.getmtime(self.model_path_CZ)))
+                logger.info("Data modyfikacji modelu N: %s", time.ctime(os.path.getmtime(self.model_path_N)))
+                self.update_fingerprint()
                 return
             except Exception as e:
-                print(f"Błąd podczas wczytywania modeli: {e}. Rozpoczęcie ponownego treningu.")
+                logger.warning("Błąd podczas wczytywania modeli: %s. Rozpoczęcie ponownego treningu.", e)
 
         # Trenuj modele
-        print("Trening modeli...")
+        logger.info("Trening modeli...")
+        from xgboost import XGBRegressor
         self.model_CZ = XGBRegressor(n_estimators=200, max_depth=5, learning_rate=0.1)
         self.model_CZ.fit(X, y_CZ)
 
         self.model_N = XGBRegressor(n_estimators=200, max_depth=5, learning_rate=0.1)
         self.model_N.fit(X, y_N)
 
-        # Usuń istniejące pliki modeli przed zapisem
+        # Usuń istniejące pliki modeli (i kopie pełnych modeli sprzed kompaktowania) przed zapisem
+        from model_compaction import full_model_path
         try:
-            if os.path.exists(self.model_path_CZ):
-                os.remove(self.model_path_CZ)
-            if os.path.exists(self.model_path_N):
-                os.remove(self.model_path_N)
+            for path in (self.model_path_CZ, self.model_path_N):
+                for old_path in (path, full_model_path(path)):
+                    if os.path.exists(old_path):
+                        os.remove(old_path)
         except Exception as e:
-            print(f"Błąd podczas usuwania starych modeli: {e}")
+            logger.error("Błąd podczas usuwania starych modeli: %s", e)
 
         # Zapis nowych modeli
         try:
             joblib.dump(self.model_CZ, self.model_path_CZ)
-            print(f"Model CZ zapisano do: {os.path.abspath(self.model_path_CZ)}")
-            print(f"Nowa data modyfikacji modelu CZ: {time.ctime(os.path.getmtime(self.model_path_CZ))}")
+            logger.info("Model CZ zapisano do: %s", os.path.abspath(self.model_path_CZ))
+            logger.debug("Nowa data modyfikacji modelu CZ: %s", time.ctime(os.path.getmtime(self.model_path_CZ)))
 
             joblib.dump(self.model_N, self.model_path_N)
-            print(f"Model N zapisano do: {os.path.abspath(self.model_path_N)}")
-            print(f"Nowa data modyfikacji modelu N: {time.ctime(os.path.getmtime(self.model_path_N))}")
+            logger.info("Model N zapisano do: %s", os.path.abspath(self.model_path_N))
+            logger.debug("Nowa data modyfikacji modelu N: %s", time.ctime(os.path.getmtime(self.model_path_N)))
         except Exception as e:
-            print(f"Błąd podczas zapisywania modeli: {e}")
+            logger.error("Błąd podczas zapisywania modeli: %s", e)
 
         # Weryfikacja zapisanych plików
         if not os.path.exists(self.model_path_CZ) or not os.path.exists(self.model_path_N):
-            print("Błąd: Modele nie zostały zapisane!")
+            logger.error("Modele nie zostały zapisane!")
         else:
-            print("Modele zostały poprawnie zapisane.")
+            logger.info("Modele zostały poprawnie zapisane.")
+            self.update_fingerprint()
+            self.compact_after_training(data)
+
+    def compact_after_training(self, data):
+        """Zastępuje zapisane modele zwartymi, jeśli ustawiono LMDB_MODEL_COMPACTION (tolerancja względna)."""
+        tolerance = os.getenv("LMDB_MODEL_COMPACTION")
+        if not tolerance:
+            return
+        from model_compaction import compact_models, format_report
+        try:
+            # Bez pomiarów czasu (ok. 50 wczytań i predykcji) – wystarczą z wiersza poleceń
+            report = compact_models(self, data, rel_tol=float(tolerance), measure_timings=False)
+            logger.info("Kompaktowanie modeli:\n%s", format_report(report))
+        except Exception:
+            logger.exception("Kompaktowanie modeli nie powiodło się – używane są pełne modele")
 
     def oblicz_bd(self, t, V, kat, material):
         """Oblicza BD na podstawie modelu."""
+        import pandas as pd
         model = self.model_CZ if material == "CZ" else self.model_N
         X_new = pd.DataFrame([[t, V, kat]], columns=['Grubosc', 'V', 'Kat'])
-        print(f"Obliczenia dla: {X_new}")
-        bd_value = model.predict(X_new)[0]
-        print(f"Wynik BD: {bd_value}")
-        return max(bd_value, 0.0)
+        with stats.timer("bd.predict"):
+            bd_value = model.predict(X_new)[0]
+        stats.incr("bd.predictions")
+        logger.debug("BD dla t=%s, V=%s, kat=%s, %s: %s", t, V, kat, material, bd_value)
+        bd_value = max(bd_value, 0.0)
+        audit.record("oblicz_bd", self.fingerprint, None, material, t, V, kat, None, bd_value)
+        return bd_value
+
+    def oblicz_bd_batch(self, t, V, kat, material):
+        """Oblicza BD dla wielu zestawów parametrów jednym wywołaniem predict."""
+        import numpy as np
+        import pandas as pd
+        model = self.model_CZ if material == "CZ" else self.model_N
+        X_new = pd.DataFrame({
+            'Grubosc': np.asarray(t, dtype=float),
+            'V': np.asarray(V, dtype=float),
+            'Kat': np.asarray(kat, dtype=float),
+        })
+        if X_new.empty:
+            return np.zeros(0)
+        with stats.timer("bd.predict_batch"):
+            bd_values = model.predict(X_new)
+        stats.incr("bd.predictions", len(X_new))
+        stats.observe("bd.batch_size", len(X_new))
+        return np.maximum(bd_values, 0.0)
+
+    def model_mtimes(self):
+        """Zwraca czasy modyfikacji plików modeli (None, jeśli plik nie istnieje)."""
+        return tuple(
+            os.path.getmtime(path) if os.path.exists(path) else None
+            for path in (self.model_path_CZ, self.model_path_N)
+        )
+
+    def update_fingerprint(self):
+        """Wylicza skrót zapisanych plików modeli."""
+        digest = hashlib.sha1()
+        for path in (self.model_path_CZ, self.model_path_N):
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    digest.update(file.read())
+        self.fingerprint = digest.hexdigest()[:12]
+        return self.fingerprint
+
+    def reload_models(self):
+        """Wczytuje modele z dysku i podmienia je dopiero po udanym wczytaniu obu plików."""
+        import joblib
+        model_CZ = joblib.load(self.model_path_CZ)
+        model_N = joblib.load(self.model_path_N)
+        self.model_CZ, self.model_N = model_CZ, model_N
+        self.update_fingerprint()
+        logger.info("Przeładowano modele (wersja %s).", self.fingerprint)
+        return self.fingerprint
@@ -0,0 +1,485 @@
+"""Biblioteka detali – indeks plików DXF ze skonfigurowanych folderów.
+
+Indeks (SQLite) przechowuje skrót pliku, obrys, liczbę linii gięcia, liczbę obiektów
+każdego typu oraz ostatnio użyte parametry. Pliki są analizowane, a miniatury renderowane
+w osobnych procesach; indeks jest aktualizowany przyrostowo na podstawie mtime i rozmiaru.
+Miniatury są zapisywane pod skrótem zawartości, więc przeniesiony plik nie wymaga
+ponownego renderowania.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QLineEdit, QPushButton,
+    QLabel, QFileDialog, QMessageBox, QSplitter, QWidget, QListView
+)
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt5.QtGui import QIcon, QPixmap
+
+from instrumentation import stats
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_CONFIG_FILE = "part_library.json"
+INDEX_FILE = "part_library.db"
+THUMBNAIL_DIR = "thumbnails"
+THUMBNAIL_SIZE = 256
+ICON_SIZE = 96
+SEARCH_LIMIT = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parts (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT,
+    min_x REAL, min_y REAL, max_x REAL, max_y REAL,
+    bend_count INTEGER,
+    entity_counts TEXT,
+    thumbnail TEXT,
+    error TEXT,
+    last_params TEXT,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS parts_name ON parts(name);
+"""
+
+
+def load_library_config():
+    """Wczytuje listę folderów biblioteki z pliku JSON."""
+    try:
+        with open(LIBRARY_CONFIG_FILE, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {"folders": []}
+    except json.JSONDecodeError as e:
+        logger.error("Błąd wczytywania konfiguracji biblioteki: %s", e)
+        return {"folders": []}
+
+
+def save_library_config(config):
+    """Zapisuje konfigurację biblioteki do pliku JSON."""
+    try:
+        with open(LIBRARY_CONFIG_FILE, "w") as file:
+            json.dump(config, file, indent=4)
+    except Exception as e:
+        logger.error("Błąd zapisu konfiguracji biblioteki: %s", e)
+
+
+##############################
+# Analiza pliku (proces roboczy)
+##############################
+def _init_worker():
+    # Proces roboczy renderuje miniatury bez okien
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def render_thumbnail(doc, file_path, size=THUMBNAIL_SIZE):
+    """Renderuje miniaturę rzutu modelu do pliku PNG."""
+    from PyQt5.QtGui import QGuiApplication, QImage, QPainter, QPainterPath, QPen, QColor
+    from dxf_blocks import BlockCache, add_entity_to_path, insert_transforms, is_bending_line
+
+    app = QGuiApplication.instance() or QGuiApplication([])  # noqa: F841 – wymagane przez QPainter
+    path = QPainterPath()
+    bends = QPainterPath()
+    blocks = BlockCache(doc)
+    for entity in doc.modelspace():
+        if entity.dxftype() == 'INSERT':
+            block_path, block_bends = blocks.get(entity.dxf.name)
+            for transform in insert_transforms(entity):
+                path.addPath(transform.map(block_path))
+                for line in block_bends:
+                    mapped = transform.map(line)
+                    bends.moveTo(mapped.p1())
+                    bends.lineTo(mapped.p2())
+        elif is_bending_line(entity):
+            add_entity_to_path(bends, entity)
+        else:
+            add_entity_to_path(path, entity)
+
+    image = QImage(size, size, QImage.Format_ARGB32)
+    image.fill(QColor("white"))
+    rect = path.boundingRect().united(bends.boundingRect())
+    if rect.width() > 0 or rect.height() > 0:
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        margin = 8
+        scale = (size - 2 * margin) / max(rect.width(), rect.height(), 1e-9)
+        painter.translate(size / 2, size / 2)
+        painter.scale(scale, scale)
+        painter.translate(-rect.center())
+        pen = QPen(QColor("black"))
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.drawPath(path)
+        bend_pen = QPen(QColor("orange"))
+        bend_pen.setCosmetic(True)
+        painter.setPen(bend_pen)
+        painter.drawPath(bends)
+        painter.end()
+    image.save(file_path, "PNG")
+
+
+def analyze_part(path, thumbnail_dir=THUMBNAIL_DIR):
+    """Analizuje plik DXF; zwraca słownik z danymi do indeksu (wykonywane w procesie roboczym)."""
+    import ezdxf
+    from ezdxf import bbox
+    from dxf_blocks import BlockCache, insert_transforms, is_bending_line
+
+    stat = os.stat(path)
+    record = {"path": path, "name": os.path.basename(path), "mtime": stat.st_mtime, "size": stat.st_size}
+    try:
+        with open(path, "rb") as file:
+            record["hash"] = hashlib.sha1(file.read()).hexdigest()
+        doc = ezdxf.readfile(path)
+        msp = doc.modelspace()
+        counts = {}
+        bend_count = 0
+        blocks = BlockCache(doc)
+        for entity in msp:
+            counts[entity.dxftype()] = counts.get(entity.dxftype(), 0) + 1
+            if entity.dxftype() == 'INSERT':
+                # Linie gięcia z wnętrza bloku – raz na każde wystąpienie (także MINSERT)
+                _, block_bends = blocks.get(entity.dxf.name)
+                bend_count += len(block_bends) * len(insert_transforms(entity))
+            elif is_bending_line(entity):
+                bend_count += 1
+        extents = bbox.extents(msp, fast=True)
+        if extents.has_data:
+            record.update(min_x=extents.extmin.x, min_y=extents.extmin.y,
+                          max_x=extents.extmax.x, max_y=extents.extmax.y)
+        record["bend_count"] = bend_count
+        record["entity_counts"] = json.dumps(counts)
+        thumbnail = os.path.join(thumbnail_dir, record["hash"] + ".png")
+        if not os.path.exists(thumbnail):
+            os.makedirs(thumbnail_dir, exist_ok=True)
+            render_thumbnail(doc, thumbnail)
+        record["thumbnail"] = thumbnail
+        record["error"] = None
+    except Exception as e:
+        record["error"] = str(e)
+    return record
+
+
+##############################
+# Indeks
+##############################
+class PartLibrary:
+    """Indeks detali w bazie SQLite."""
+
+    def __init__(self, index_file=INDEX_FILE, thumbnail_dir=THUMBNAIL_DIR):
+        self.index_file = index_file
+        self.thumbnail_dir = thumbnail_dir
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @staticmethod
+    def exists(index_file=INDEX_FILE):
+        """Czy indeks został już utworzony (biblioteka była otwierana)."""
+        return os.path.exists(index_file)
+
+    @contextmanager
+    def _connect(self):
+        """Połączenie z transakcją – zatwierdzane i zamykane po wyjściu z bloku."""
+        conn = sqlite3.connect(self.index_file)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def scan(self, folders, progress=None, max_workers=None):
+        """Aktualizuje indeks przyrostowo; zwraca (przeanalizowane, usunięte, bez zmian)."""
+        with stats.timer("library.scan"):
+            found = {}
+            for folder in folders:
+                for root, _, files in os.walk(folder):
+                    for name in files:
+                        if name.lower().endswith(".dxf"):
+                            path = os.path.abspath(os.path.join(root, name))
+                            try:
+                                stat = os.stat(path)
+                            except OSError:
+                                continue
+                            found[path] = (stat.st_mtime, stat.st_size)
+
+            with self._connect() as conn:
+                indexed = {row["path"]: (row["mtime"], row["size"])
+                           for row in conn.execute("SELECT path, mtime, size FROM parts")}
+                removed = [p for p in indexed if p not in found]
+                conn.executemany("DELETE FROM parts WHERE path = ?", [(p,) for p in removed])
+
+            changed = [p for p, key in found.items() if indexed.get(p) != key]
+            if changed:
+                # "spawn" – skanowanie działa w wątku aplikacji Qt, fork takiego procesu jest niebezpieczny
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                         mp_context=multiprocessing.get_context("spawn")) as pool:
+                    futures = [pool.submit(analyze_part, path, self.thumbnail_dir) for path in changed]
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        self._store(future.result())
+                        if progress is not None:
+                            progress(done, len(changed))
+            stats.incr("library.indexed", len(changed))
+            return len(changed), len(removed), len(found) - len(changed)
+
+    def _store(self, record):
+        columns = ["path", "name", "mtime", "size", "hash", "min_x", "min_y", "max_x", "max_y",
+                   "bend_count", "entity_counts", "thumbnail", "error"]
+        values = [record.get(c) for c in columns]
+        with self._connect() as conn:
+            # Ostatnio użyte parametry zostają zachowane przy ponownej analizie pliku
+            conn.execute(
+                f"INSERT INTO parts ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(path) DO UPDATE SET "
+                + ", ".join(f"{c} = excluded.{c}" for c in columns[1:]),
+                values,
+            )
+
+    def search(self, text="", limit=SEARCH_LIMIT):
+        """Wyszukuje detale po nazwie lub ścieżce (ostatnio używane najpierw)."""
+        pattern = f"%{text.strip()}%"
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT * FROM parts WHERE name LIKE ? OR path LIKE ? "
+                "ORDER BY last_used IS NULL, last_used DESC, name LIMIT ?",
+                (pattern, pattern, limit),
+            )]
+
+    def get(self, path):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM parts WHERE path = ?", (os.path.abspath(path),)).fetchone()
+            return dict(row) if row else None
+
+    def record_usage(self, path, params):
+        """Zapamiętuje parametry (grubość, V, materiał) ostatniego użycia detalu."""
+        with self._connect() as conn:
+            conn.execute("UPDATE parts SET last_params = ?, last_used = ? WHERE path = ?",
+                         (json.dumps(params), time.time(), os.path.abspath(path)))
+
+
+class UsageTask(QRunnable):
+    """Zapisuje parametry użycia detalu poza wątkiem GUI."""
+
+    def __init__(self, library, path, params):
+        super().__init__()
+        self.library = library
+        self.path = path
+        self.params = params
+
+    def run(self):
+        try:
+            self.library.record_usage(self.path, self.params)
+        except Exception:
+            logger.exception("Nie udało się zapisać parametrów detalu w bibliotece")
+
+
+##############################
+# Okno biblioteki
+##############################
+class _ScanSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class _ScanTask(QRunnable):
+    def __init__(self, library, folders, signals):
+        super().__init__()
+        self.library = library
+        self.folders = folders
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.library.scan(self.folders, progress=self.signals.progress.emit)
+            self.signals.finished.emit(result)
+        except Exception as e:
+            logger.exception("Błąd indeksowania biblioteki detali")
+            self.signals.failed.emit(str(e))
+
+
+class PartLibraryDialog(QDialog):
+    """Przeglądarka biblioteki detali z wyszukiwaniem i podglądem."""
+    # Sloty mierzone przez watchdog UI (ui_watchdog.instrument_class)
+    TIMED_SLOTS = ("on_scan_progress", "on_scan_finished", "on_scan_failed", "add_folder", "clear_folders",
+                   "start_scan", "refresh_list", "show_preview", "open_selected")
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.setWindowTitle("Biblioteka Detali")
+        self.main_window = main_window
+        self.library = PartLibrary()
+        self.config = load_library_config()
+        self._icons = {}  # Ścieżka miniatury -> QIcon
+        self._scanning = False
+        self._signals = _ScanSignals()
+        self._signals.progress.connect(self.on_scan_progress)
+        self._signals.finished.connect(self.on_scan_finished)
+        self._signals.failed.connect(self.on_scan_failed)
+        self.init_ui()
+        self.refresh_list()
+        self.start_scan()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        folders_layout = QHBoxLayout()
+        self.folders_label = QLabel()
+        folders_layout.addWidget(self.folders_label, stretch=1)
+        add_folder_button = QPushButton("Dodaj Folder")
+        add_folder_button.clicked.connect(self.add_folder)
+        folders_layout.addWidget(add_folder_button)
+        remove_folder_button = QPushButton("Usuń Foldery")
+        remove_folder_button.clicked.connect(self.clear_folders)
+        folders_layout.addWidget(remove_folder_button)
+        self.scan_button = QPushButton("Odśwież Indeks")
+        self.scan_button.clicked.connect(self.start_scan)
+        folders_layout.addWidget(self.scan_button)
+        layout.addLayout(folders_layout)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Szukaj detalu...")
+        self.search_input.textChanged.connect(self.refresh_list)
+        layout.addWidget(self.search_input)
+
+        splitter = QSplitter(Qt.Horizontal)
+        self.list_widget = QListWidget()
+        self.list_widget.setViewMode(QListView.IconMode)
+        self.list_widget.setIconSize(QSize(ICON_SIZE, ICON_SIZE))
+        self.list_widget.setResizeMode(QListView.Adjust)
+        self.list_widget.setUniformItemSizes(True)
+        self.list_widget.currentItemChanged.connect(self.show_preview)
+        self.list_widget.itemDoubleClicked.connect(self.open_selected)
+        splitter.addWidget(self.list_widget)
+
+        preview = QWidget()
+        preview_layout = QVBoxLayout()
+        self.preview_image = QLabel()
+        self.preview_image.setAlignment(Qt.AlignCenter)
+        self.preview_image.setMinimumSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        preview_layout.addWidget(self.preview_image)
+        self.preview_info = QLabel()
+        self.preview_info.setWordWrap(True)
+        self.preview_info.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        preview_layout.addWidget(self.preview_info, stretch=1)
+        open_button = QPushButton("Otwórz")
+        open_button.clicked.connect(self.open_selected)
+        preview_layout.addWidget(open_button)
+        preview.setLayout(preview_layout)
+        splitter.addWidget(preview)
+        splitter.setStretchFactor(0, 3)
+        layout.addWidget(splitter)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+        self.resize(1000, 650)
+        self.update_folders_label()
+
+    def update_folders_label(self):
+        folders = self.config.get("folders", [])
+        self.folders_label.setText("Foldery: " + ("; ".join(folders) if folders else "(brak)"))
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Wybierz Folder z Detalami")
+        if folder and folder not in self.config.setdefault("folders", []):
+            self.config["folders"].append(folder)
+            save_library_config(self.config)
+            self.update_folders_label()
+            self.start_scan()
+
+    def clear_folders(self):
+        self.config["folders"] = []
+        save_library_config(self.config)
+        self.update_folders_label()
+        self.start_scan()
+
+    def start_scan(self):
+        if self._scanning:
+            return
+        self._scanning = True
+        self.scan_button.setEnabled(False)
+        self.status_label.setText("Indeksowanie...")
+        QThreadPool.globalInstance().start(_ScanTask(self.library, list(self.config.get("folders", [])),
+                                                     self._signals))
+
+    def on_scan_progress(self, done, total):
+        self.status_label.setText(f"Indeksowanie: {done}/{total}")
+
+    def on_scan_finished(self, result):
+        self._scanning = False
+        self.scan_button.setEnabled(True)
+        analyzed, removed, unchanged = result
+        self.status_label.setText(f"Indeks aktualny: nowe/zmienione {analyzed}, usunięte {removed}, "
+                                  f"bez zmian {unchanged}")
+        if analyzed or removed:
+            self.refresh_list()
+
+    def on_scan_failed(self, message):
+        self._scanning = False
+        self.scan_button.setEnabled(True)
+        self.status_label.setText(f"Błąd indeksowania: {message}")
+
+    def _icon(self, thumbnail):
+        if thumbnail not in self._icons:
+            self._icons[thumbnail] = QIcon(thumbnail) if thumbnail and os.path.exists(thumbnail) else QIcon()
+        return self._icons[thumbnail]
+
+    def refresh_list(self):
+        with stats.timer("library.search"):
+            records = self.library.search(self.search_input.text())
+        self.list_widget.clear()
+        for record in records:
+            item = QListWidgetItem(self._icon(record["thumbnail"]), record["name"])
+            item.setData(Qt.UserRole, record)
+            item.setToolTip(record["path"])
+            self.list_widget.addItem(item)
+
+    def show_preview(self, item, previous=None):
+        if item is None:
+            self.preview_image.clear()
+            self.preview_info.clear()
+            return
+        record = item.data(Qt.UserRole)
+        if record["thumbnail"] and os.path.exists(record["thumbnail"]):
+            self.preview_image.setPixmap(QPixmap(record["thumbnail"]))
+        else:
+            self.preview_image.clear()
+        lines = [record["path"]]
+        if record["error"]:
+            lines.append(f"Błąd analizy: {record['error']}")
+        if record["min_x"] is not None:
+            lines.append(f"Wymiary: {record['max_x'] - record['min_x']:.1f} × {record['max_y'] - record['min_y']:.1f} mm")
+        if record["bend_count"] is not None:
+            lines.append(f"Linie gięcia: {record['bend_count']}")
+        if record["entity_counts"]:
+            counts = json.loads(record["entity_counts"])
+            lines.append("Obiekty: " + ", ".join(f"{k}: {v}" for k, v in sorted(counts.items())))
+        if record["last_params"]:
+            params = json.loads(record["last_params"])
+            lines.append(f"Ostatnie parametry: grubość {params.get('grubosc')} mm, V {params.get('V')} mm, "
+                         f"materiał {params.get('material')}")
+        self.preview_info.setText("\n".join(lines))
+
+    def open_selected(self, *args):
+        item = self.list_widget.currentItem()
+        if item is None:
+            return
+        record = item.data(Qt.UserRole)
+        if not os.path.exists(record["path"]):
+            QMessageBox.warning(self, "Błąd", f"Plik nie istnieje:\n{record['path']}")
+            return
+        self.main_window.open_dxf_file(record["path"])
+        if record["last_params"]:
+            self.main_window.apply_parameters(json.loads(record["last_params"]))
+        self.accept()
@@ -0,0 +1,304 @@
+"""Diagnostyka modeli: residua względem zmierzonych BD_CZ/BD_N.
+
+Cała tabela treningowa jest przewidywana jednym wywołaniem predict na materiał, a krzywe
+BD(kąt) są próbkowane gęsto również jedną paczką na materiał. Wyniki są liczone w tle
+i przechowywane w pamięci podręcznej dla danej wersji modelu i danych.
+"""
+
+import copy
+import logging
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QTableWidget, QTableWidgetItem, QComboBox,
+    QLabel, QGraphicsScene, QGraphicsView, QWidget
+)
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QPointF, pyqtSignal
+from PyQt5.QtGui import QColor, QPen, QPainterPath, QPainter, QBrush
+
+from instrumentation import stats
+
+logger = logging.getLogger(__name__)
+
+MATERIAL_COLUMNS = {"CZ": "BD_CZ", "N": "BD_N"}
+CURVE_SAMPLES = 181  # Liczba próbek kąta na krzywej BD(kąt)
+HEATMAP_LIMIT = 1.0  # Residuum [mm], przy którym kolor mapy osiąga pełne nasycenie
+
+
+def data_version(data):
+    """Skrót zawartości tabeli treningowej – zmienia się po każdej edycji danych."""
+    return int(pd.util.hash_pandas_object(data[["Grubosc", "V", "Kat", "BD_CZ", "BD_N"]], index=False).sum())
+
+
+def compute_residuals(model, data):
+    """Zwraca słownik materiał -> wyniki diagnostyki (residua, mapa, krzywe, podsumowanie)."""
+    with stats.timer("residuals.compute"):
+        data = data.dropna(subset=["Grubosc", "V", "Kat", "BD_CZ", "BD_N"])
+        t = data["Grubosc"].to_numpy(dtype=float)
+        V = data["V"].to_numpy(dtype=float)
+        kat = data["Kat"].to_numpy(dtype=float)
+
+        # Siatka krzywych: każda para (grubość, V) z danych × gęsto próbkowany kąt
+        combos = data[["Grubosc", "V"]].drop_duplicates().sort_values(["Grubosc", "V"]).to_numpy(dtype=float)
+        angles = np.linspace(kat.min(), kat.max(), CURVE_SAMPLES) if len(kat) else np.zeros(0)
+        curve_t = np.repeat(combos[:, 0], len(angles))
+        curve_V = np.repeat(combos[:, 1], len(angles))
+        curve_kat = np.tile(angles, len(combos))
+
+        results = {}
+        for material, column in MATERIAL_COLUMNS.items():
+            measured = data[column].to_numpy(dtype=float)
+            # Jedna paczka na materiał: punkty pomiarowe + próbki krzywych
+            predicted_all = model.oblicz_bd_batch(np.concatenate([t, curve_t]), np.concatenate([V, curve_V]),
+                                                  np.concatenate([kat, curve_kat]), material)
+            predicted = predicted_all[:len(t)]
+            curves = predicted_all[len(t):].reshape(len(combos), len(angles))
+            residual = measured - predicted
+            table = pd.DataFrame({"Grubosc": t, "V": V, "Kat": kat, "measured": measured,
+                                  "predicted": predicted, "residual": residual})
+            heatmap = table.pivot_table(index=["Grubosc", "V"], columns="Kat", values="residual", aggfunc="mean")
+            results[material] = {
+                "table": table,
+                "heatmap": heatmap,
+                "curve_combos": combos,
+                "curve_angles": angles,
+                "curves": curves,
+                "mae": float(np.abs(residual).mean()) if len(residual) else 0.0,
+                "rmse": float(np.sqrt((residual ** 2).mean())) if len(residual) else 0.0,
+                "max_abs": float(np.abs(residual).max()) if len(residual) else 0.0,
+            }
+        return results
+
+
+class _ResidualSignals(QObject):
+    finished = pyqtSignal(object, object)  # (klucz, wyniki)
+    failed = pyqtSignal(object, str)
+
+
+class _ResidualTask(QRunnable):
+    def __init__(self, key, model, data, signals):
+        super().__init__()
+        self.key = key
+        self.model = model
+        self.data = data
+        self.signals = signals
+
+    def run(self):
+        try:
+            self.signals.finished.emit(self.key, compute_residuals(self.model, self.data))
+        except Exception as e:
+            logger.exception("Błąd obliczania residuów")
+            self.signals.failed.emit(self.key, str(e))
+
+
+class ResidualCache(QObject):
+    """Liczy residua w tle i przechowuje je dla (wersja modelu, wersja danych)."""
+
+    ready = pyqtSignal(object)  # Klucz gotowych wyników
+    failed = pyqtSignal(object, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._results = {}
+        self._pending = set()
+        self._signals = _ResidualSignals()
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+    @staticmethod
+    def key(model, data):
+        return model.fingerprint, data_version(data)
+
+    def get(self, model, data):
+        """Zwraca gotowe wyniki lub None (wtedy zleca obliczenia w tle)."""
+        key = self.key(model, data)
+        if key in self._results:
+            return self._results[key]
+        self.prefetch(model, data, key)
+        return None
+
+    def prefetch(self, model, data, key=None):
+        key = key or self.key(model, data)
+        if key in self._results or key in self._pending:
+            return key
+        self._pending.add(key)
+        # Kopia BDModel z referencjami do bieżących regresorów – ponowny trening w DataEditorDialog
+        # podmienia model_CZ/model_N na nowe obiekty i nie zmienia modeli używanych w tle
+        snapshot = copy.copy(model)
+        QThreadPool.globalInstance().start(_ResidualTask(key, snapshot, data.copy(), self._signals))
+        return key
+
+    def _on_finished(self, key, results):
+        self._pending.discard(key)
+        # Zachowujemy tylko wyniki bieżącej wersji – starsze nie są już potrzebne
+        self._results = {key: results}
+        self.ready.emit(key)
+
+    def _on_failed(self, key, message):
+        self._pending.discard(key)
+        self.failed.emit(key, message)
+
+
+def _residual_color(value):
+    """Kolor komórki mapy: czerwony – model zaniża BD, niebieski – model zawyża."""
+    if value is None or np.isnan(value):
+        return QColor("white")
+    strength = min(abs(value) / HEATMAP_LIMIT, 1.0)
+    level = int(255 * (1 - strength))
+    return QColor(255, level, level) if value > 0 else QColor(level, level, 255)
+
+
+class ResidualDashboard(QDialog):
+    """Okno diagnostyki modeli: mapa residuów i krzywe BD(kąt)."""
+    # Sloty mierzone przez watchdog UI (ui_watchdog.instrument_class)
+    TIMED_SLOTS = ("on_results_ready", "on_results_failed", "show_residuals", "render_curve",)
+
+    def __init__(self, main_window, cache):
+        super().__init__(main_window)
+        self.setWindowTitle("Diagnostyka Modeli – Residua")
+        self.main_window = main_window
+        self.cache = cache
+        self.results = None
+        self.cache.ready.connect(self.on_results_ready)
+        self.cache.failed.connect(self.on_results_failed)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel("Materiał:"))
+        self.material_input = QComboBox()
+        self.material_input.addItems(list(MATERIAL_COLUMNS))
+        self.material_input.currentIndexChanged.connect(self.show_residuals)
+        top_layout.addWidget(self.material_input)
+        self.summary_label = QLabel()
+        top_layout.addWidget(self.summary_label, stretch=1)
+        layout.addLayout(top_layout)
+
+        self.tabs = QTabWidget()
+        self.heatmap_table = QTableWidget()
+        self.heatmap_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabs.addTab(self.heatmap_table, "Mapa residuów (grubość × V × kąt)")
+
+        curves_widget = QWidget()
+        curves_layout = QVBoxLayout()
+        combo_layout = QHBoxLayout()
+        combo_layout.addWidget(QLabel("Grubość / V:"))
+        self.combo_input = QComboBox()
+        self.combo_input.currentIndexChanged.connect(self.render_curve)
+        combo_layout.addWidget(self.combo_input, stretch=1)
+        curves_layout.addLayout(combo_layout)
+        self.curve_scene = QGraphicsScene()
+        self.curve_view = QGraphicsView(self.curve_scene)
+        self.curve_view.setRenderHint(QPainter.Antialiasing)
+        curves_layout.addWidget(self.curve_view)
+        curves_widget.setLayout(curves_layout)
+        self.tabs.addTab(curves_widget, "Krzywe BD(kąt)")
+
+        layout.addWidget(self.tabs)
+        self.setLayout(layout)
+        self.resize(900, 600)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.load()
+
+    def load(self):
+        mw = self.main_window
+        if mw.model is None or mw.data is None:
+            self.summary_label.setText("Dane lub modele nie zostały jeszcze wczytane.")
+            return
+        self.results = self.cache.get(mw.model, mw.data)
+        if self.results is None:
+            self.summary_label.setText("Obliczanie residuów w tle...")
+        else:
+            self.show_residuals()
+
+    def on_results_ready(self, key):
+        if self.isVisible():
+            self.load()
+
+    def on_results_failed(self, key, message):
+        self.summary_label.setText(f"Błąd obliczeń: {message}")
+
+    def current(self):
+        if self.results is None:
+            return None
+        return self.results.get(self.material_input.currentText())
+
+    def show_residuals(self):
+        result = self.current()
+        if result is None:
+            return
+        self.summary_label.setText(
+            f"MAE: {result['mae']:.3f} mm   RMSE: {result['rmse']:.3f} mm   Max |r|: {result['max_abs']:.3f} mm"
+        )
+        heatmap = result["heatmap"]
+        self.heatmap_table.clear()
+        self.heatmap_table.setRowCount(len(heatmap.index))
+        self.heatmap_table.setColumnCount(len(heatmap.columns))
+        self.heatmap_table.setHorizontalHeaderLabels([f"{k:g}°" for k in heatmap.columns])
+        self.heatmap_table.setVerticalHeaderLabels([f"{t:g} / V{v:g}" for t, v in heatmap.index])
+        values = heatmap.to_numpy()
+        for row in range(values.shape[0]):
+            for col in range(values.shape[1]):
+                value = values[row, col]
+                item = QTableWidgetItem("" if np.isnan(value) else f"{value:+.2f}")
+                item.setBackground(_residual_color(value))
+                item.setTextAlignment(Qt.AlignCenter)
+                self.heatmap_table.setItem(row, col, item)
+        self.heatmap_table.resizeColumnsToContents()
+
+        current = self.combo_input.currentIndex()
+        self.combo_input.blockSignals(True)
+        self.combo_input.clear()
+        self.combo_input.addItems([f"{t:g} mm / V{v:g}" for t, v in result["curve_combos"]])
+        self.combo_input.setCurrentIndex(max(current, 0))
+        self.combo_input.blockSignals(False)
+        self.render_curve()
+
+    def render_curve(self):
+        result = self.current()
+        self.curve_scene.clear()
+        index = self.combo_input.currentIndex()
+        if result is None or index < 0 or not len(result["curve_angles"]):
+            return
+        angles = result["curve_angles"]
+        curve = result["curves"][index]
+        t, v = result["curve_combos"][index]
+        table = result["table"]
+        points = table[(table["Grubosc"] == t) & (table["V"] == v)]
+
+        # Skalowanie do prostokąta 600 × 300 (oś Y skierowana w górę)
+        width, height = 600.0, 300.0
+        y_values = np.concatenate([curve, points["measured"].to_numpy()])
+        y_min, y_max = float(y_values.min()), float(y_values.max())
+        y_span = (y_max - y_min) or 1.0
+        x_min, x_span = float(angles[0]), float(angles[-1] - angles[0]) or 1.0
+
+        def to_scene(x, y):
+            return QPointF((x - x_min) / x_span * width, height - (y - y_min) / y_span * height)
+
+        axis_pen = QPen(QColor("gray"))
+        self.curve_scene.addLine(0, height, width, height, axis_pen)
+        self.curve_scene.addLine(0, 0, 0, height, axis_pen)
+        for text, pos in ((f"{x_min:g}°", QPointF(0, height + 4)),
+                          (f"{angles[-1]:g}°", QPointF(width - 30, height + 4)),
+                          (f"{y_max:.2f}", QPointF(-50, -8)),
+                          (f"{y_min:.2f}", QPointF(-50, height - 16))):
+            label = self.curve_scene.addText(text)
+            label.setPos(pos)
+
+        path = QPainterPath(to_scene(angles[0], curve[0]))
+        for x, y in zip(angles[1:], curve[1:]):
+            path.lineTo(to_scene(x, y))
+        curve_pen = QPen(QColor("blue"))
+        curve_pen.setWidth(2)
+        self.curve_scene.addPath(path, curve_pen)
+
+        point_brush = QBrush(QColor("red"))
+        for x, y in zip(points["Kat"], points["measured"]):
+            p = to_scene(x, y)
+            self.curve_scene.addEllipse(p.x() - 3, p.y() - 3, 6, 6, QPen(Qt.NoPen), point_brush)
+        self.curve_view.fitInView(self.curve_scene.itemsBoundingRect(), Qt.KeepAspectRatio)
@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem
 from PyQt5.QtCore import Qt
 
+from bd_core import calculate_part
+
 
 class SegmentManager:
     def __init__(self, parent):
@@ -10,7 +12,7 @@ class SegmentManager:
 
     def calculate_total_bd(self, params, model):
         """Oblicza całkowity ubytek materiału."""
-        total_length, total_bd = 0.0, 0.0
+        rows, lengths, angles = [], [], []
 
         for row in range(self.table.rowCount()):
             length_item = self.table.item(row, 0)
@@ -19,15 +21,16 @@ class SegmentManager:
             if not length_item or not angle_item:
                 continue
 
-            length = float(length_item.text())
-            angle = float(length_item.text())
-            bd = model.oblicz_bd(float(params["grubosc"]), float(params["V"]), angle, params["material"])
+            rows.append(row)
+            lengths.append(float(length_item.text()))
+            angles.append(float(angle_item.text()))
 
-            total_length += length
-            total_bd += bd
+        result = calculate_part(model, float(params["grubosc"]), float(params["V"]), params["material"],
+                                lengths, angles)
 
+        for row, bd in zip(rows, result["bd"]):
             bd_item = QTableWidgetItem(f"{bd:.2f}")
             bd_item.setFlags(Qt.ItemIsEnabled)
             self.table.setItem(row, 2, bd_item)
 
-        return f"Łączna długość: {total_length} mm\nUbytek: {total_bd} mm"
+        return f"Łączna długość: {result['total_length']} mm\nUbytek: {result['total_bd']} mm"
@@ -0,0 +1,262 @@
+"""Nagrywanie i odtwarzanie sesji operatora do testów regresji opóźnień.
+
+SessionRecorder zapisuje akcje wysokiego poziomu z MainWindow do pliku JSONL (jedna akcja
+w wierszu, czas od początku sesji w sekundach):
+    load      – wczytanie pliku DXF ("path")
+    toggle    – zaznaczenie/odznaczenie linii gięcia ("key" = data(2) elementu, "on")
+    edit      – edycja komórki tabeli segmentów ("row", "col", "text")
+    params    – zmiana grubości/V/materiału ("grubosc", "V", "material")
+    calculate – naciśnięcie "Oblicz Łączną Długość"
+
+Nagrywanie włącza zmienna LMDB_SESSION_LOG (ścieżka pliku lub "1" – plik w reports/sessions/).
+
+Odtwarzanie (Qt w trybie offscreen) wykonuje akcje ponownie na nowym MainWindow i raportuje
+percentyle czasu każdego typu akcji:
+    python session_recorder.py reports/sessions/session.jsonl --repeat 5 --out replay.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from PyQt5.QtCore import QObject, QLineF
+
+from instrumentation import Histogram
+
+logger = logging.getLogger(__name__)
+
+SESSION_DIR = os.path.join("reports", "sessions")
+FORMAT_VERSION = 1
+
+
+def session_log_path():
+    """Ścieżka pliku sesji z LMDB_SESSION_LOG albo None, gdy nagrywanie jest wyłączone."""
+    value = os.getenv("LMDB_SESSION_LOG", "")
+    if not value or value == "0":
+        return None
+    if value == "1":
+        return os.path.join(SESSION_DIR, time.strftime("session_%Y%m%d_%H%M%S.jsonl"))
+    return value
+
+
+##############################
+# Nagrywanie
+##############################
+class SessionRecorder(QObject):
+    """Zapisuje akcje operatora wykonywane w MainWindow."""
+    # Sloty mierzone przez watchdog UI (ui_watchdog.instrument_class)
+    TIMED_SLOTS = ("on_dxf_loaded", "on_bend_toggled", "on_cell_committed", "on_params_changed", "on_calculate")
+
+    def __init__(self, window, file_path):
+        super().__init__(window)
+        self.window = window
+        self.file_path = file_path
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        # Buforowanie wierszami – po awarii aplikacji log jest kompletny do ostatniej akcji
+        self._file = open(file_path, "a", encoding="utf-8", buffering=1)
+        self._start = time.perf_counter()
+        self._write("session", version=FORMAT_VERSION, created=time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+        window.dxf_loaded.connect(self.on_dxf_loaded)
+        window.bend_toggled.connect(self.on_bend_toggled)
+        window.table.itemDelegate().commitData.connect(self.on_cell_committed)
+        for combo in (window.grubosc_input, window.V_input, window.material_input):
+            combo.activated.connect(self.on_params_changed)  # Tylko zmiany dokonane przez użytkownika
+        window.calculate_button.clicked.connect(self.on_calculate)
+        logger.info("Nagrywanie sesji do %s", file_path)
+
+    def _write(self, action, **fields):
+        if self._file is None:
+            return
+        record = {"t": round(time.perf_counter() - self._start, 3), "a": action}
+        record.update(fields)
+        self._file.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def on_dxf_loaded(self, file_path):
+        self._write("load", path=os.path.abspath(file_path))
+
+    def on_bend_toggled(self, key, selected):
+        self._write("toggle", key=key, on=selected)
+
+    def on_cell_committed(self, editor):
+        # Slot widoku (zapis do modelu) jest połączony wcześniej, więc komórka ma już nową wartość
+        table = self.window.table
+        row, col = table.currentRow(), table.currentColumn()
+        item = table.item(row, col)
+        if item is not None:
+            self._write("edit", row=row, col=col, text=item.text())
+
+    def on_params_changed(self, index):
+        self._write("params", grubosc=self.window.grubosc_input.currentText(),
+                    V=self.window.V_input.currentText(),
+                    material=self.window.material_input.currentText())
+
+    def on_calculate(self):
+        self._write("calculate")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+##############################
+# Odtwarzanie
+##############################
+def load_session(file_path):
+    """Wczytuje akcje sesji (bez wiersza nagłówka)."""
+    actions = []
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record["a"] != "session":
+                actions.append(record)
+    return actions
+
+
+class SessionReplayer:
+    """Wykonuje nagrane akcje na MainWindow i mierzy czas każdej z nich."""
+
+    def __init__(self, app, window, dxf_dir=None):
+        self.app = app
+        self.window = window
+        self.dxf_dir = dxf_dir
+        self.bend_lines = {}  # Klucz linii gięcia -> element sceny (po ostatnim wczytaniu)
+        self.histograms = {}
+        self.fallbacks = 0
+        self.skipped = 0
+        self.errors = []  # Komunikaty błędów, które aplikacja pokazałaby w oknach QMessageBox
+
+    def _resolve(self, path):
+        if os.path.exists(path) or not self.dxf_dir:
+            return path
+        return os.path.join(self.dxf_dir, os.path.basename(path))
+
+    def _index_bend_lines(self):
+        self.bend_lines = {str(item.data(2)): item for item in self.window.dxf_scene.items()
+                           if item.data(0) == "bending"}
+
+    def _load(self, action):
+        self.window.open_dxf_file(self._resolve(action["path"]))
+        self._index_bend_lines()
+        self.window.dxf_view.resetTransform()
+
+    def _toggle(self, action):
+        from gui_harness import click
+        item = self.bend_lines.get(action["key"])
+        if item is None:
+            self.skipped += 1
+            return
+        view = self.window.dxf_view
+        line = QLineF(item.mapToScene(item.line().p1()), item.mapToScene(item.line().p2()))
+        view.centerOn(line.center())
+        click(view, line.center())
+        if (item.data(1) == "selected") != action["on"]:
+            # Kliknięcie trafiło w inną linię (np. nakładające się linie) – wywołanie bezpośrednie
+            self.fallbacks += 1
+            self.window.handle_bending_line_click(item, line.center())
+
+    def _edit(self, action):
+        item = self.window.table.item(action["row"], action["col"])
+        if item is None:
+            self.skipped += 1
+            return
+        item.setText(action["text"])
+
+    def _params(self, action):
+        self.window.apply_parameters(action)
+
+    def _calculate(self, action):
+        self.window.calculate_total_bd()
+
+    def replay(self, actions):
+        from gui_harness import MessageBoxGuard
+        handlers = {"load": self._load, "toggle": self._toggle, "edit": self._edit,
+                    "params": self._params, "calculate": self._calculate}
+        # Modalne okna komunikatów zawiesiłyby odtwarzanie offscreen – zapisujemy je w raporcie
+        with MessageBoxGuard() as guard:
+            for action in actions:
+                handler = handlers.get(action["a"])
+                if handler is None:
+                    logger.warning("Nieznana akcja w sesji: %s", action["a"])
+                    continue
+                start = time.perf_counter()
+                handler(action)
+                self.app.processEvents()  # Praca odłożona do pętli zdarzeń też należy do akcji
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                self.histograms.setdefault(action["a"], Histogram()).add(elapsed_ms)
+        self.errors.extend(f"{title}: {text}" for _, title, text in guard.errors)
+
+    def report(self):
+        result = {}
+        for name, histogram in sorted(self.histograms.items()):
+            result[name] = {
+                "count": histogram.count,
+                "total_ms": round(histogram.total, 3),
+                "p50_ms": round(histogram.percentile(50), 3),
+                "p90_ms": round(histogram.percentile(90), 3),
+                "p99_ms": round(histogram.percentile(99), 3),
+                "max_ms": round(histogram.max, 3),
+            }
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odtwarzanie nagranej sesji i pomiar opóźnień akcji.")
+    parser.add_argument("session", help="Plik JSONL nagrany przez SessionRecorder.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dxf-dir", help="Folder z plikami DXF, gdy ścieżki z nagrania nie istnieją.")
+    parser.add_argument("--out", help="Plik wynikowy JSON (domyślnie standardowe wyjście).")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QT_VERSION_STR
+    from gui_harness import git_revision
+    from audit_log import audit
+    from data_loader import load_data
+    from model_utils import BDModel
+    from ui_main import MainWindow
+
+    audit.enabled = False  # Odtwarzane obliczenia nie trafiają do produkcyjnego dziennika BD
+    app = QApplication.instance() or QApplication(sys.argv)
+    data = load_data()
+    model = BDModel()
+    model.train_models(data, force_retrain=False)
+    actions = load_session(args.session)
+
+    window = MainWindow(None, None)
+    window.part_usage_enabled = False  # Odtwarzanie nie zapisuje parametrów detali w bibliotece
+    window.set_backend(data, model)
+    replayer = SessionReplayer(app, window, args.dxf_dir)
+    for _ in range(args.repeat):
+        replayer.replay(actions)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "session": os.path.abspath(args.session),
+        "revision": git_revision(),
+        "qt": QT_VERSION_STR,
+        "repeat": args.repeat,
+        "actions": len(actions),
+        "fallback_clicks": replayer.fallbacks,
+        "skipped": replayer.skipped,
+        "errors": replayer.errors,
+        "timings": replayer.report(),
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Mierzy czas poszczególnych faz startu aplikacji i drukuje zestawienie."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []  # Lista (nazwa, czas trwania [s], czas od startu [s])
+
+    @contextmanager
+    def phase(self, name):
+        """Mierzy czas bloku kodu jako jedną fazę startu."""
+        phase_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases.append((name, end - phase_start, end - self.start))
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def as_dict(self):
+        return {
+            "phases": [
+                {"name": name, "duration_ms": round(duration * 1000, 1), "at_ms": round(at * 1000, 1)}
+                for name, duration, at in self.phases
+            ],
+            "total_ms": round(self.elapsed() * 1000, 1),
+        }
+
+    def report(self, title="Czas startu aplikacji"):
+        """Zwraca tekstowe zestawienie faz startu."""
+        width = max([len(name) for name, _, _ in self.phases] + [4])
+        lines = [title, "-" * (width + 28)]
+        for name, duration, at in self.phases:
+            lines.append(f"{name:<{width}}  {duration * 1000:9.1f} ms  @ {at * 1000:9.1f} ms")
+        lines.append("-" * (width + 28))
+        lines.append(f"{'Razem':<{width}}  {self.elapsed() * 1000:9.1f} ms")
+        return "\n".join(lines)
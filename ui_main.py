@@ -3,11 +3,24 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QVBoxLayout, QLabel, QPushButton, QTableWidget,
     QTableWidgetItem, QMessageBox, QComboBox, QHBoxLayout, QWidget,
-    QGraphicsView, QGraphicsScene, QFileDialog, QGraphicsLineItem
+    QGraphicsView, QGraphicsScene, QFileDialog, QGraphicsLineItem, QTabBar
 )
-from PyQt5.QtCore import Qt, QPoint, QPointF, QRectF, QLineF
-from PyQt5.QtGui import QTransform, QPainter, QPen, QColor, QPainterPath
-import ezdxf
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRectF, QLineF, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QColor
+import logging
+import os
+
+from instrumentation import stats
+from ui_watchdog import instrument_class
+from dxf_tessellation import tolerance_level
+from dxf_reload import DxfFileWatcher, diff_entities
+from dxf_stream import GeometryCache
+from document_tabs import DocumentState, ParseSignals, ParseTask
+from bd_core import PredictionCache, calculate_part
+
+logger = logging.getLogger(__name__)
+
+CURVE_DETAIL_DELAY_MS = 50  # Zoom i przesunięcia są zbierane przed ponowną tesselacją krzywych
 
 
 ##############################
@@ -73,34 +86,35 @@ class CustomGraphicsView(QGraphicsView):
             if (event.pos() - self._mouse_pressed_position).manhattanLength() < 10:
                 try:
                     pos = self.mapToScene(event.pos())
-                    print("Mouse released at scene pos:", pos)
-                    tolerance = 20.0
-                    search_rect = QRectF(pos.x() - tolerance, pos.y() - tolerance, tolerance * 2, tolerance * 2)
-                    items = self.scene().items(search_rect, Qt.IntersectsItemShape)
-                    closest_item = None
-                    closest_distance = tolerance
-                    for item in items:
-                        if isinstance(item, QGraphicsLineItem) and item.data(0) == "bending":
-                            p1 = item.mapToScene(item.line().p1())
-                            p2 = item.mapToScene(item.line().p2())
-                            qline = QLineF(p1, p2)
-                            distance = self._distance_to_point(qline, pos)
-                            print("Found bending line with distance:", distance)
-                            if distance < closest_distance:
-                                closest_distance = distance
-                                closest_item = item
+                    logger.debug("Mouse released at scene pos: (%.2f, %.2f)", pos.x(), pos.y())
+                    with stats.timer("view.hit_test"):
+                        tolerance = 20.0
+                        search_rect = QRectF(pos.x() - tolerance, pos.y() - tolerance, tolerance * 2, tolerance * 2)
+                        items = self.scene().items(search_rect, Qt.IntersectsItemShape)
+                        closest_item = None
+                        closest_distance = tolerance
+                        for item in items:
+                            if isinstance(item, QGraphicsLineItem) and item.data(0) == "bending":
+                                p1 = item.mapToScene(item.line().p1())
+                                p2 = item.mapToScene(item.line().p2())
+                                qline = QLineF(p1, p2)
+                                distance = self._distance_to_point(qline, pos)
+                                if distance < closest_distance:
+                                    closest_distance = distance
+                                    closest_item = item
+                    stats.observe("view.hit_test_candidates", len(items))
                     if closest_item is not None:
                         p1 = closest_item.mapToScene(closest_item.line().p1())
                         p2 = closest_item.mapToScene(closest_item.line().p2())
                         qline = QLineF(p1, p2)
                         clicked_point = QPointF((qline.x1() + qline.x2()) / 2, (qline.y1() + qline.y2()) / 2)
-                        print("Closest bending line found. Center at:", clicked_point)
+                        logger.debug("Closest bending line found at distance %.2f", closest_distance)
                         if self.main_window:
                             self.main_window.handle_bending_line_click(closest_item, clicked_point)
                     else:
-                        print("No bending line found within tolerance.")
-                except Exception as e:
-                    print("Exception in mouseReleaseEvent:", e)
+                        logger.debug("No bending line found within tolerance.")
+                except Exception:
+                    logger.exception("Exception in mouseReleaseEvent")
         super().mouseReleaseEvent(event)
 
     def wheelEvent(self, event):
@@ -110,21 +124,60 @@ class CustomGraphicsView(QGraphicsView):
             self.scale(zoom_in_factor, zoom_in_factor)
         else:
             self.scale(zoom_out_factor, zoom_out_factor)
+        if self.main_window is not None:
+            self.main_window.schedule_curve_detail()
 
 
 ##############################
 # Klasa MainWindow
 ##############################
 class MainWindow(QMainWindow):
-    def __init__(self, data, model, matrix_config_editor, data_editor):
+    # Sloty mierzone przez watchdog UI (ui_watchdog.instrument_class)
+    TIMED_SLOTS = ("update_curve_detail", "schedule_curve_detail", "reload_dxf_file", "on_document_parsed",
+                   "on_document_failed", "open_matrix_config_editor", "open_data_editor",
+                   "open_die_comparison", "open_part_library", "export_bd_tables",
+                   "open_residual_dashboard", "open_diagnostics", "update_v_input", "calculate_total_bd",
+                   "load_dxf_file", "load_dxf_files_in_tabs", "switch_document", "close_document",
+                   "add_segment_via_plus", "remove_segment_by_button")
+
+    # Zdarzenia wysokiego poziomu (używane m.in. przez SessionRecorder)
+    dxf_loaded = pyqtSignal(str)  # Ścieżka wczytanego pliku
+    bend_toggled = pyqtSignal(str, bool)  # Klucz linii gięcia (data(2)), czy zaznaczona
+
+    def __init__(self, data, model, matrix_config_editor=None, data_editor=None):
         super().__init__()
         self.setWindowTitle("Kalkulator Ubytku Materiału BD")
         self.data = data
         self.model = model
-        self.matrix_config_editor = matrix_config_editor
-        self.data_editor = data_editor
+        # Dialogi są tworzone przy pierwszym otwarciu (patrz open_matrix_config_editor/open_data_editor)
+        self._matrix_config_editor = matrix_config_editor
+        self._data_editor = data_editor
         self.last_selected_x = None  # Absolutny x ostatnio zaznaczonej linii
+        self.die_comparison_dialog = None
+        self.residual_cache = None
+        self.residual_dashboard = None
+        self.part_library = None  # Indeks biblioteki detali (tworzony przy pierwszym otwarciu)
+        self.part_usage_enabled = True  # Wyłączane przez benchmark i odtwarzanie sesji
         self.dxf_scene = QGraphicsScene()
+        self.current_dxf_path = None
+        self.entity_items = {}  # Uchwyt obiektu DXF -> elementy sceny
+        self.entity_signatures = {}  # Uchwyt obiektu DXF -> sygnatura geometrii
+        self.curve_items = {}  # Uchwyt obiektu DXF -> [(element sceny, krzywa)] – tesselacja zależna od zoomu
+        self.curve_level = tolerance_level(1.0)
+        self.curve_detail_timer = QTimer(self)
+        self.curve_detail_timer.setSingleShot(True)
+        self.curve_detail_timer.setInterval(CURVE_DETAIL_DELAY_MS)
+        self.curve_detail_timer.timeout.connect(self.update_curve_detail)
+        self.scene_offset = (0.0, 0.0)
+        self.dxf_watcher = DxfFileWatcher(self)
+        self.dxf_watcher.file_changed.connect(self.reload_dxf_file)
+        # Karty dokumentów współdzielą model, pamięć podręczną geometrii i predykcji
+        self.active_document = None
+        self.geometry_cache = GeometryCache()
+        self.prediction_cache = PredictionCache()
+        self.parse_signals = ParseSignals(self)
+        self.parse_signals.finished.connect(self.on_document_parsed)
+        self.parse_signals.failed.connect(self.on_document_failed)
         self.init_ui()
         self.showMaximized()
 
@@ -133,6 +186,17 @@ class MainWindow(QMainWindow):
         self.status_bar = self.statusBar()
         self.status_bar.showMessage("X: 0.00, Y: 0.00")
 
+        # Menu narzędzi – dialogi budowane przy pierwszym otwarciu
+        tools_menu = self.menuBar().addMenu("Narzędzia")
+        tools_menu.addAction("Przypisz Matryce", self.open_matrix_config_editor)
+        tools_menu.addAction("Edycja Danych Treningowych", self.open_data_editor)
+        tools_menu.addAction("Porównanie Matryc", self.open_die_comparison)
+        tools_menu.addAction("Biblioteka Detali", self.open_part_library)
+        tools_menu.addAction("Eksport Tabel BD (XML)", self.export_bd_tables)
+        tools_menu.addSeparator()
+        tools_menu.addAction("Diagnostyka Modeli (Residua)", self.open_residual_dashboard)
+        tools_menu.addAction("Diagnostyka Wydajności", self.open_diagnostics)
+
         self.main_widget = QWidget()
         self.main_layout = QHBoxLayout()
 
@@ -167,6 +231,7 @@ class MainWindow(QMainWindow):
 
         self.calculate_button = QPushButton("Oblicz Łączną Długość")
         self.calculate_button.clicked.connect(self.calculate_total_bd)
+        self.calculate_button.setEnabled(self.model is not None)
         left_layout.addWidget(self.calculate_button)
 
         self.result_label = QLabel()
@@ -179,14 +244,29 @@ class MainWindow(QMainWindow):
         # Prawa sekcja – widok DXF
         right_widget = QWidget()
         right_layout = QVBoxLayout()
+        buttons_layout = QHBoxLayout()
         load_dxf_button = QPushButton("Wczytaj Plik DXF")
         load_dxf_button.clicked.connect(self.load_dxf_file)
-        right_layout.addWidget(load_dxf_button)
+        buttons_layout.addWidget(load_dxf_button)
+        open_tabs_button = QPushButton("Otwórz w Nowych Kartach")
+        open_tabs_button.clicked.connect(self.load_dxf_files_in_tabs)
+        buttons_layout.addWidget(open_tabs_button)
+        right_layout.addLayout(buttons_layout)
+        self.document_tabs = QTabBar()
+        self.document_tabs.setTabsClosable(True)
+        self.document_tabs.setMovable(True)
+        self.document_tabs.setExpanding(False)
+        self.document_tabs.currentChanged.connect(self.switch_document)
+        self.document_tabs.tabCloseRequested.connect(self.close_document)
+        right_layout.addWidget(self.document_tabs)
         self.dxf_view = CustomGraphicsView()
         self.dxf_view.setScene(self.dxf_scene)
         self.dxf_view.setAlignment(Qt.AlignCenter)
         self.dxf_view.setDragMode(QGraphicsView.ScrollHandDrag)
         self.dxf_view.main_window = self
+        # Przesunięcie widoku odsłania krzywe, które mogą mieć jeszcze dokładność z poprzedniego zoomu
+        self.dxf_view.horizontalScrollBar().valueChanged.connect(self.schedule_curve_detail)
+        self.dxf_view.verticalScrollBar().valueChanged.connect(self.schedule_curve_detail)
         right_layout.addWidget(self.dxf_view)
         right_widget.setLayout(right_layout)
 
@@ -196,6 +276,144 @@ class MainWindow(QMainWindow):
         self.main_widget.setLayout(self.main_layout)
         self.setCentralWidget(self.main_widget)
 
+    def set_backend(self, data, model):
+        """Ustawia dane i model wczytane po wyświetleniu okna."""
+        self.data = data
+        self.model = model
+        self.calculate_button.setEnabled(model is not None)
+        self.populate_comboboxes()
+        self.prefetch_residuals()
+
+    def prefetch_residuals(self):
+        """Zleca w tle obliczenie residuów modeli, żeby okno diagnostyki otwierało się od razu."""
+        if self.data is None or self.model is None:
+            return
+        if self.residual_cache is None:
+            from residual_dashboard import ResidualCache
+            self.residual_cache = ResidualCache(self)
+        self.residual_cache.prefetch(self.model, self.data)
+
+    @property
+    def matrix_config_editor(self):
+        if self._matrix_config_editor is None and self.data is not None:
+            from matrix_config_editor import MatrixConfigEditor
+            instrument_class(MatrixConfigEditor)
+            grubosci = sorted(self.data['Grubosc'].unique())
+            matryce = sorted(set(self.data['V'].unique()))
+            self._matrix_config_editor = MatrixConfigEditor(grubosci, matryce, self)
+        return self._matrix_config_editor
+
+    @property
+    def data_editor(self):
+        if self._data_editor is None and self.data is not None:
+            from data_editor import DataEditorDialog
+            instrument_class(DataEditorDialog)
+            self._data_editor = DataEditorDialog(self.data, self)
+        return self._data_editor
+
+    def open_matrix_config_editor(self):
+        if self.matrix_config_editor is None:
+            QMessageBox.information(self, "Informacja", "Dane treningowe nie zostały jeszcze wczytane.")
+            return
+        self.matrix_config_editor.exec_()
+        self.update_v_input()
+
+    def open_data_editor(self):
+        if self.data_editor is None:
+            QMessageBox.information(self, "Informacja", "Dane treningowe nie zostały jeszcze wczytane.")
+            return
+        if self.data_editor.exec_():
+            # Edytor pracuje na kopii danych – po zapisie tworzymy go od nowa
+            self._data_editor = None
+            self._matrix_config_editor = None
+            self.populate_comboboxes()
+            self.prefetch_residuals()
+
+    def open_die_comparison(self):
+        if self.model is None:
+            QMessageBox.information(self, "Informacja", "Modele nie zostały jeszcze wczytane.")
+            return
+        if self.die_comparison_dialog is None:
+            from die_comparison import DieComparisonDialog
+            instrument_class(DieComparisonDialog)
+            self.die_comparison_dialog = DieComparisonDialog(self)
+        self.die_comparison_dialog.show()
+        self.die_comparison_dialog.raise_()
+
+    def open_residual_dashboard(self):
+        if self.model is None or self.data is None:
+            QMessageBox.information(self, "Informacja", "Dane lub modele nie zostały jeszcze wczytane.")
+            return
+        if self.residual_dashboard is None:
+            from residual_dashboard import ResidualDashboard
+            instrument_class(ResidualDashboard)
+            self.prefetch_residuals()
+            self.residual_dashboard = ResidualDashboard(self, self.residual_cache)
+        self.residual_dashboard.show()
+        self.residual_dashboard.raise_()
+
+    def open_part_library(self):
+        from part_library import PartLibraryDialog
+        instrument_class(PartLibraryDialog)
+        dialog = PartLibraryDialog(self)
+        self.part_library = dialog.library
+        dialog.exec_()
+        dialog.deleteLater()
+
+    def export_bd_tables(self):
+        if self.model is None:
+            QMessageBox.information(self, "Informacja", "Modele nie zostały jeszcze wczytane.")
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Wybierz Folder Eksportu Tabel BD")
+        if not folder:
+            return
+        from bd_table_export import DEFAULT_ANGLES, angle_grid, export_tables
+        from die_comparison import allowed_dies
+        from matrix_config_editor import load_matrix_config
+        thicknesses, widths = allowed_dies(load_matrix_config())
+        if len(thicknesses) == 0:
+            QMessageBox.information(self, "Informacja", "Brak dozwolonych matryc w konfiguracji.")
+            return
+        try:
+            paths, _ = export_tables(self.model, folder, thicknesses, widths, angle_grid(*DEFAULT_ANGLES))
+        except Exception as e:
+            logger.exception("Błąd eksportu tabel BD")
+            QMessageBox.warning(self, "Błąd", f"Nie udało się zapisać tabel BD:\n{e}")
+            return
+        QMessageBox.information(self, "Eksport Tabel BD", "Zapisano pliki:\n" + "\n".join(paths))
+
+    def apply_parameters(self, params):
+        """Ustawia grubość, V i materiał zapamiętane dla detalu (pomija wartości spoza list)."""
+        for combo, key in ((self.material_input, "material"), (self.grubosc_input, "grubosc"),
+                           (self.V_input, "V")):
+            # Zmiana grubości przebudowuje listę V, dlatego V ustawiamy na końcu
+            if params.get(key) is None:
+                continue
+            index = combo.findText(str(params[key]))
+            if index >= 0:
+                combo.setCurrentIndex(index)
+
+    def record_part_usage(self, grubosc, V, material):
+        """Zapisuje w bibliotece detali (w tle) parametry użyte dla bieżącego pliku DXF.
+
+        Indeks nie jest tworzony przy obliczeniach – zapis odbywa się tylko, jeśli biblioteka
+        była już otwierana.
+        """
+        if not self.current_dxf_path or not self.part_usage_enabled:
+            return
+        from part_library import PartLibrary, UsageTask
+        if self.part_library is None:
+            if not PartLibrary.exists():
+                return
+            self.part_library = PartLibrary()
+        params = {"grubosc": grubosc, "V": V, "material": material}
+        QThreadPool.globalInstance().start(UsageTask(self.part_library, self.current_dxf_path, params))
+
+    def open_diagnostics(self):
+        from diagnostics_dialog import DiagnosticsDialog
+        instrument_class(DiagnosticsDialog)
+        DiagnosticsDialog(self).exec_()
+
     def update_status_bar(self, pos: QPointF):
         msg = f"X: {pos.x():.2f}, Y: {pos.y():.2f}"
         self.status_bar.showMessage(msg)
@@ -250,167 +468,312 @@ class MainWindow(QMainWindow):
         remove_button.clicked.connect(self.remove_segment_by_button)
         self.table.setCellWidget(row, 3, remove_button)
 
-    def insert_segment_sorted(self, new_x, line_id):
-        insertion_index = self.table.rowCount() - 1  # Przed plus row
-        for row in range(self.table.rowCount() - 1):
-            item = self.table.item(row, 0)
-            if item is not None:
-                existing_x = item.data(Qt.UserRole + 1)
-                if existing_x is None:
-                    existing_x = 0.0
-                if new_x < existing_x:
-                    insertion_index = row
-                    break
-        self.insert_segment_row(insertion_index, absolute_x=new_x, default_angle=90, line_id=line_id)
-        self.recalc_segments()
-
-    def recalc_segments(self):
-        n = self.table.rowCount() - 1  # Pomijamy plus row
-        if n <= 0:
-            return
-        segments = []
-        for row in range(n):
-            item = self.table.item(row, 0)
-            if item is not None:
-                absolute_x = item.data(Qt.UserRole + 1)
-                segments.append((row, absolute_x))
-        segments.sort(key=lambda x: x[1])
-        prev_x = None
-        for (row, absolute_x) in segments:
-            if prev_x is None:
-                segment_value = absolute_x
-            else:
-                segment_value = absolute_x - prev_x
-            prev_x = absolute_x
-            self.table.item(row, 0).setText(f"{segment_value:.2f}")
-
-    def find_segment_row_by_line_id(self, line_id):
-        for row in range(self.table.rowCount() - 1):
-            item = self.table.item(row, 0)
-            if item is not None and item.data(Qt.UserRole) == line_id:
-                return row
-        return None
-
-    def remove_segment_by_button(self):
-        button = self.sender()
-        if button:
-            for row in range(self.table.rowCount()):
-                widget = self.table.cellWidget(row, 3)
-                if widget is button:
-                    item = self.table.item(row, 0)
-                    if item is not None:
-                        line_id = item.data(Qt.UserRole)
-                        if line_id is not None:
-                            for scene_item in self.dxf_scene.items():
-                                if isinstance(scene_item, QGraphicsLineItem) and scene_item.data(1) == "selected":
-                                    if id(scene_item) == line_id:
-                                        pen = QPen(QColor("yellow"))
-                                        scene_item.setPen(pen)
-                                        scene_item.setData(1, None)
-                                        print("Minus clicked: Unselected bending line with id", line_id)
-                                        break
-                    self.table.removeRow(row)
-                    break
-        if self.table.rowCount() == 0:
-            self.add_plus_row()
-        else:
-            self.recalc_segments()
-
     def load_dxf_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Wybierz Plik DXF", "", "Pliki DXF (*.dxf)")
         if not file_path:
             return
+        self.open_dxf_file(file_path)
+
+    def open_dxf_file(self, file_path):
+        """Wczytuje plik do bieżącej karty (nowej, jeśli żadna nie jest otwarta)."""
         try:
-            # Resetujemy tabelę segmentów i zmienną last_selected_x
-            self.table.setRowCount(0)
-            self.last_selected_x = None
-            self.remove_all_plus_rows()
-            self.ensure_plus_row()
-
-            doc = ezdxf.readfile(file_path)
-            self.dxf_scene.clear()
-            for entity in doc.modelspace():
-                if entity.dxftype() == 'LINE':
-                    start = entity.dxf.start
-                    end = entity.dxf.end
-                    if hasattr(entity.dxf, 'color') and entity.dxf.color == 2:
-                        pen = QPen(QColor("yellow"))
-                        bending_line = QGraphicsLineItem(start.x, -start.y, end.x, -end.y)
-                        bending_line.setPen(pen)
-                        bending_line.setData(0, "bending")
-                        self.dxf_scene.addItem(bending_line)
-                    else:
-                        self.dxf_scene.addLine(start.x, -start.y, end.x, -end.y)
-                elif entity.dxftype() == 'CIRCLE':
-                    center = entity.dxf.center
-                    radius = entity.dxf.radius
-                    self.dxf_scene.addEllipse(center.x - radius, -center.y - radius, 2 * radius, 2 * radius)
-                elif entity.dxftype() == 'ARC':
-                    center = entity.dxf.center
-                    radius = entity.dxf.radius
-                    start_angle = entity.dxf.start_angle
-                    end_angle = entity.dxf.end_angle
-                    start_angle_qt = -start_angle
-                    span_angle_qt = -(end_angle - start_angle)
-                    rect = QRectF(center.x - radius, -center.y - radius, 2 * radius, 2 * radius)
-                    path = QPainterPath()
-                    path.arcMoveTo(rect, start_angle_qt)
-                    path.arcTo(rect, start_angle_qt, span_angle_qt)
-                    self.dxf_scene.addPath(path)
-                elif entity.dxftype() == 'POLYLINE':
-                    points = [point for point in entity.points()]
-                    for i in range(len(points) - 1):
-                        self.dxf_scene.addLine(points[i][0], -points[i][1],
-                                               points[i + 1][0], -points[i + 1][1])
-                elif entity.dxftype() == 'LWPOLYLINE':
-                    points = list(entity.points())
-                    for i in range(len(points)):
-                        start_point = points[i]
-                        end_point = points[(i + 1) % len(points)]
-                        bulge = start_point[4] if len(start_point) > 4 else 0
-                        if bulge == 0:
-                            self.dxf_scene.addLine(start_point[0], -start_point[1],
-                                                   end_point[0], -end_point[1])
-                        else:
-                            self.draw_bulge_arc(start_point, end_point, bulge)
+            with stats.timer("dxf.load"):
+                geometry = self.geometry_cache.load(file_path)
+                if self.active_document is None:
+                    self._add_document_tab(DocumentState(file_path), activate=True)
+                document = self.active_document
+                document.reset(file_path, geometry)
+                self._update_document_tab(document)
+                self._show_document(document)
+            logger.info("Wczytano plik DXF %s (%d obiektów)", file_path, len(self.entity_items))
+            self.dxf_loaded.emit(file_path)
+        except Exception as e:
+            logger.exception("Błąd wczytywania pliku DXF %s", file_path)
+            QMessageBox.warning(self, "Błąd", f"Nie udało się wczytać pliku DXF:\n{e}")
+
+    def load_dxf_files_in_tabs(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Wybierz Pliki DXF", "", "Pliki DXF (*.dxf)")
+        if file_paths:
+            self.open_documents(file_paths)
+
+    def open_documents(self, file_paths):
+        """Otwiera pliki w nowych kartach; pliki spoza pamięci podręcznej są wczytywane w tle."""
+        first = None
+        for file_path in file_paths:
+            document = DocumentState(file_path)
+            geometry = self.geometry_cache.get(file_path)
+            if geometry is not None:
+                document.set_geometry(geometry)
+            else:
+                self._start_parse(document)
+            index = self._add_document_tab(document)
+            first = index if first is None else first
+        if first is not None:
+            self.document_tabs.setCurrentIndex(first)
+
+    def _start_parse(self, document):
+        if document.loading:
+            return
+        document.loading = True
+        QThreadPool.globalInstance().start(ParseTask(document, self.parse_signals))
+
+    def on_document_parsed(self, document, geometry, key):
+        path, mtime, size = key
+        self.geometry_cache.put(path, geometry, key)
+        if document.closed or os.path.abspath(document.file_path) != path:
+            return  # Karta zamknięta lub w międzyczasie wczytano do niej inny plik
+        # Wyświetlany dokument dostaje tylko zmiany (przeładowanie), nowy jest rysowany w całości
+        displayed = document is self.active_document and document.geometry is not None
+        document.set_geometry(geometry, (mtime, size))
+        self._update_document_tab(document)
+        if displayed:
+            self._apply_geometry_changes(geometry)
+        elif document is self.active_document:
+            self._show_document(document)
+            self.dxf_loaded.emit(document.file_path)
+        if document.is_stale():
+            self._start_parse(document)  # Plik zmienił się ponownie w trakcie wczytywania
+
+    def on_document_failed(self, document, message):
+        document.loading = False
+        if document.closed:
+            return
+        if document.geometry is not None:
+            # Nieudane ponowne wczytanie – karta zostaje przy poprzedniej geometrii
+            logger.warning("Nie udało się ponownie wczytać %s: %s", document.file_path, message)
+            return
+        document.error = message
+        self._update_document_tab(document)
+        if document is self.active_document:
+            QMessageBox.warning(self, "Błąd", f"Nie udało się wczytać pliku DXF:\n{message}")
+
+    def _add_document_tab(self, document, activate=False):
+        # Sygnały są blokowane, żeby dodanie pierwszej karty nie przełączało dokumentu przed jego wczytaniem
+        self.document_tabs.blockSignals(True)
+        index = self.document_tabs.addTab(document.title)
+        self.document_tabs.setTabData(index, document)
+        self.document_tabs.setTabToolTip(index, document.file_path)
+        if activate:
+            self.document_tabs.setCurrentIndex(index)
+            self.active_document = document
+        self.document_tabs.blockSignals(False)
+        return index
+
+    def _update_document_tab(self, document):
+        for index in range(self.document_tabs.count()):
+            if self.document_tabs.tabData(index) is document:
+                self.document_tabs.setTabText(index, document.title)
+                self.document_tabs.setTabToolTip(index, document.file_path)
+
+    def switch_document(self, index):
+        document = self.document_tabs.tabData(index) if index >= 0 else None
+        if document is self.active_document:
+            return
+        with stats.timer("dxf.switch_document"):
+            self._save_document_state(self.active_document)
+            self.active_document = document
+            if document is not None and document.is_stale():
+                # Plik zmienił się, gdy karta była nieaktywna – do końca wczytywania w tle
+                # wyświetlana jest poprzednia geometria
+                geometry = self.geometry_cache.get(document.file_path)
+                if geometry is not None:
+                    document.set_geometry(geometry)
                 else:
-                    print(f"Nieobsługiwany typ: {entity.dxftype()}")
+                    self._start_parse(document)
+            self._show_document(document)
+
+    def close_document(self, index):
+        document = self.document_tabs.tabData(index)
+        document.closed = True
+        if document is self.active_document:
+            self.active_document = None  # Stan zamykanej karty nie jest zapisywany
+        # Usunięcie karty wywołuje currentChanged (switch_document) dla karty sąsiedniej
+        self.document_tabs.removeTab(index)
+
+    def _save_document_state(self, document):
+        """Zapamiętuje segmenty, parametry i widok karty przed zwolnieniem elementów sceny."""
+        if document is None or document.geometry is None:
+            return
+        line_keys = {id(item): item.data(2) for item in self.dxf_scene.items() if item.data(1) == "selected"}
+        segments = []
+        for row in range(self.table.rowCount() - 1):
+            length_item = self.table.item(row, 0)
+            if length_item is None:
+                continue
+            angle_item = self.table.item(row, 1)
+            bd_item = self.table.item(row, 2)
+            segments.append((
+                length_item.data(Qt.UserRole + 1),
+                angle_item.text() if angle_item is not None else "90",
+                line_keys.get(length_item.data(Qt.UserRole)),
+                bd_item.text() if bd_item is not None else "",
+            ))
+        document.segments = segments
+        document.params = {"grubosc": self.grubosc_input.currentText(), "V": self.V_input.currentText(),
+                           "material": self.material_input.currentText()}
+        document.result_text = self.result_label.text()
+        document.view_transform = self.dxf_view.transform()
+        document.view_center = self.dxf_view.mapToScene(self.dxf_view.viewport().rect().center())
+
+    def _show_document(self, document):
+        """Buduje scenę i tabelę segmentów dokumentu (None – pusta scena)."""
+        self.table.setRowCount(0)
+        self.last_selected_x = None
+        self.remove_all_plus_rows()
+        self.ensure_plus_row()
+        self.dxf_scene.clear()
+        self.entity_items = {}
+        self.curve_items = {}
+        self.entity_signatures = {}
+        self.current_dxf_path = document.file_path if document is not None else None
+        self.result_label.setText(document.result_text if document is not None else "")
+        if document is None or document.geometry is None:
+            self.dxf_watcher.watch(None)
+            return
+
+        self.entity_items = document.geometry.add_to_scene(self.dxf_scene, self.curve_level, self.curve_items)
+        self.entity_signatures = document.geometry.signatures
+        with stats.timer("dxf.adjust_scene_origin"):
             self.adjust_scene_origin()
+        if document.view_transform is None:
             self.dxf_view.resetTransform()
             self.dxf_view.fitInView(self.dxf_scene.sceneRect(), Qt.KeepAspectRatio)
             self.dxf_view.centerOn(self.dxf_scene.sceneRect().center())
-        except Exception as e:
-            QMessageBox.warning(self, "Błąd", f"Nie udało się wczytać pliku DXF:\n{e}")
+        else:
+            self.dxf_view.setTransform(document.view_transform)
+            self.dxf_view.centerOn(document.view_center)
+        self.update_curve_detail()
+        self._restore_segments(document)
+        self.dxf_watcher.watch(document.file_path)
+        stats.incr("dxf.entities", len(self.entity_items))
+
+    def _restore_segments(self, document):
+        if document.params:
+            self.apply_parameters(document.params)
+        if not document.segments:
+            return
+        bending_lines = {item.data(2): item for item in self.dxf_scene.items() if item.data(0) == "bending"}
+        for absolute_x, angle, key, bd_text in document.segments:
+            line_id = None
+            if key is not None:
+                item = bending_lines.get(key)
+                if item is None:
+                    continue  # Linia gięcia zniknęła z rysunku
+                self._mark_bending_line_selected(item)
+                line_id = id(item)
+                line = QLineF(item.mapToScene(item.line().p1()), item.mapToScene(item.line().p2()))
+                absolute_x = line.center().x()
+            row = self.table.rowCount() - 1  # Przed plus row
+            self.insert_segment_row(row, absolute_x, default_angle=angle, line_id=line_id)
+            self.table.item(row, 2).setText(bd_text)
+        self.recalc_segments()
+
+    def _mark_bending_line_selected(self, item):
+        item.setData(1, "selected")
+        pen = QPen(QColor("magenta"))
+        pen.setWidth(2)
+        item.setPen(pen)
+
+    def reload_dxf_file(self, file_path=None):
+        """Zleca wczytanie zmienionego pliku w tle; zmiany nanosi _apply_geometry_changes.
+
+        Nieudany odczyt (plik jeszcze zapisywany) jest tylko logowany – kolejna zmiana
+        wywoła ponowną próbę.
+        """
+        file_path = file_path or self.current_dxf_path
+        if not file_path or file_path != self.current_dxf_path or self.active_document is None:
+            return
+        self._start_parse(self.active_document)
+
+    def _apply_geometry_changes(self, geometry):
+        """Aktualizuje tylko zmienione obiekty wyświetlanego rysunku i zachowuje zaznaczenia."""
+        with stats.timer("dxf.reload"):
+            new_signatures = geometry.signatures
+            added, removed, changed = diff_entities(self.entity_signatures, new_signatures)
+            self.entity_signatures = new_signatures
+            if not (added or removed or changed):
+                return
+
+            # Usuwamy elementy obiektów usuniętych i zmienionych, zapamiętując zaznaczone linie gięcia
+            selected = {}  # Klucz linii gięcia -> line_id wiersza tabeli
+            for handle in removed | changed:
+                self.curve_items.pop(handle, None)
+                for item in self.entity_items.pop(handle, []):
+                    if item.data(1) == "selected":
+                        selected[item.data(2)] = id(item)
+                    self.dxf_scene.removeItem(item)
+
+            dx, dy = self.scene_offset
+            new_bending_lines = {}
+            items_by_handle = geometry.add_to_scene(self.dxf_scene, self.curve_level, self.curve_items, added | changed)
+            for handle, items in items_by_handle.items():
+                for item in items:
+                    item.moveBy(dx, dy)
+                    if item.data(0) == "bending":
+                        new_bending_lines[item.data(2)] = item
+                self.entity_items[handle] = items
+
+            # Przenosimy zaznaczenia linii, które nadal istnieją; pozostałe wiersze usuwamy
+            for key, line_id in selected.items():
+                row = self.find_segment_row_by_line_id(line_id)
+                if row is None:
+                    continue
+                item = new_bending_lines.get(key)
+                if item is None:
+                    self.table.removeRow(row)
+                    continue
+                self._mark_bending_line_selected(item)
+                line = QLineF(item.mapToScene(item.line().p1()), item.mapToScene(item.line().p2()))
+                dlugosc_item = self.table.item(row, 0)
+                dlugosc_item.setData(Qt.UserRole, id(item))
+                dlugosc_item.setData(Qt.UserRole + 1, line.center().x())
 
-    def draw_bulge_arc(self, start_point, end_point, bulge):
-        import math
-        chord_length = math.sqrt((end_point[0] - start_point[0]) ** 2 + (end_point[1] - start_point[1]) ** 2)
-        radius = abs(chord_length / (2 * math.sin(2 * math.atan(bulge))))
-        center_x = (start_point[0] + end_point[0]) / 2
-        center_y = (start_point[1] + end_point[1]) / 2
-        angle_start = math.degrees(math.atan2(start_point[1] - center_y, start_point[0] - center_x))
-        angle_end = math.degrees(math.atan2(end_point[1] - center_y, end_point[0] - center_x))
-        rect = QRectF(center_x - radius, -center_y - radius, 2 * radius, 2 * radius)
-        path = QPainterPath()
-        path.arcMoveTo(rect, angle_start)
-        path.arcTo(rect, angle_start, angle_end - angle_start)
-        self.dxf_scene.addPath(path)
+            self.dxf_scene.setSceneRect(self.dxf_scene.itemsBoundingRect())
+            self.recalc_segments()
+            self.update_totals_from_table()
+        self.status_bar.showMessage(
+            f"Przeładowano rysunek: dodane {len(added)}, usunięte {len(removed)}, zmienione {len(changed)}", 5000)
+        logger.info("Przeładowano %s: +%d -%d ~%d", self.current_dxf_path, len(added), len(removed), len(changed))
+
+    def schedule_curve_detail(self, *args):
+        self.curve_detail_timer.start()
+
+    def update_curve_detail(self):
+        """Dostosowuje dokładność tesselacji widocznych krzywych do bieżącego powiększenia.
+
+        Krzywe poza widokiem zachowują dotychczasową łamaną i są przeliczane dopiero,
+        gdy pojawią się w widoku (poziom elementu jest zapisany w data(3)).
+        """
+        self.curve_detail_timer.stop()
+        level = tolerance_level(self.dxf_view.transform().m11())
+        self.curve_level = level
+        if not self.curve_items:
+            return
+        visible = self.dxf_view.mapToScene(self.dxf_view.viewport().rect()).boundingRect()
+        with stats.timer("dxf.curve_detail"):
+            for item in self.dxf_scene.items(visible):
+                if item.data(3) is None or item.data(3) == level:
+                    continue
+                for curve_item, curve in self.curve_items.get(item.data(2), ()):
+                    if curve_item is item:
+                        if curve.adaptive:
+                            item.setPath(curve.path(level))
+                        item.setData(3, level)
 
     def adjust_scene_origin(self):
         # Przesuwamy elementy tak, aby dolny lewy róg bounding recta był w (0,0)
         bounding_rect = self.dxf_scene.itemsBoundingRect()
-        print("Before adjust_scene_origin, bounding_rect:", bounding_rect)
         dx = -bounding_rect.left()
         dy = -bounding_rect.bottom()
         for item in self.dxf_scene.items():
             item.moveBy(dx, dy)
+        self.scene_offset = (dx, dy)  # Używane przy przyrostowym przeładowaniu rysunku
         new_rect = self.dxf_scene.itemsBoundingRect()
         self.dxf_scene.setSceneRect(0, 0, new_rect.width(), new_rect.height())
-        print("After adjust_scene_origin, sceneRect:", self.dxf_scene.sceneRect())
+        logger.debug("adjust_scene_origin: przesunięcie (%.2f, %.2f)", dx, dy)
 
     def handle_bending_line_click(self, item, clicked_point):
         new_line_x = clicked_point.x()
-        print("handle_bending_line_click - clicked_point:", clicked_point)
         # Toggle: jeśli linia już zaznaczona, odznacz ją
         if item.data(1) == "selected":
             row_index = self.find_segment_row_by_line_id(id(item))
@@ -420,15 +783,16 @@ class MainWindow(QMainWindow):
             pen = QPen(QColor("yellow"))
             item.setPen(pen)
             self.recalc_segments()
-            print("Unselected bending line. Segment removed.")
+            logger.debug("Unselected bending line. Segment removed.")
+            self.bend_toggled.emit(str(item.data(2)), False)
             return
-        print("Selecting bending line with x =", new_line_x)
+        logger.debug("Selecting bending line with x = %.2f", new_line_x)
         item.setData(1, "selected")
         pen = QPen(QColor("magenta"))
         pen.setWidth(2)
         item.setPen(pen)
         self.insert_segment_sorted(new_line_x, line_id=id(item))
-        print("Selected bending line. New segment inserted.")
+        self.bend_toggled.emit(str(item.data(2)), True)
 
     def update_v_input(self):
         selected_grubosc = self.grubosc_input.currentText()
@@ -444,6 +808,10 @@ class MainWindow(QMainWindow):
         n = self.table.rowCount() - 1
         if n <= 0:
             return
+        with stats.timer("segments.recalc"):
+            self._recalc_segment_lengths(n)
+
+    def _recalc_segment_lengths(self, n):
         segments = []
         for row in range(n):
             item = self.table.item(row, 0)
@@ -460,6 +828,23 @@ class MainWindow(QMainWindow):
             prev_x = absolute_x
             self.table.item(row, 0).setText(f"{segment_value:.2f}")
 
+    def get_segments(self):
+        """Zwraca listy długości i kątów segmentów z tabeli (z pominięciem niepoprawnych wierszy)."""
+        lengths, angles = [], []
+        for row in range(self.table.rowCount() - 1):
+            dlugosc_item = self.table.item(row, 0)
+            kat_item = self.table.item(row, 1)
+            if not dlugosc_item or not kat_item:
+                continue
+            try:
+                dlugosc = float(dlugosc_item.text())
+                kat = float(kat_item.text())
+            except ValueError:
+                continue
+            lengths.append(dlugosc)
+            angles.append(kat)
+        return lengths, angles
+
     def find_segment_row_by_line_id(self, line_id):
         for row in range(self.table.rowCount() - 1):
             item = self.table.item(row, 0)
@@ -484,7 +869,7 @@ class MainWindow(QMainWindow):
                                     pen = QPen(QColor("yellow"))
                                     scene_item.setPen(pen)
                                     scene_item.setData(1, None)
-                                    print("Minus clicked: Unselected bending line with id", line_id)
+                                    logger.debug("Minus clicked: Unselected bending line with id %s", line_id)
                                     break
                     self.table.removeRow(row)
                     break
@@ -514,29 +899,55 @@ class MainWindow(QMainWindow):
         self.add_plus_row()
         self.recalc_segments()
 
+    def update_totals_from_table(self):
+        """Odświeża podsumowanie na podstawie wartości w tabeli, bez ponownej predykcji BD."""
+        if not self.result_label.text():
+            return
+        total_length = 0.0
+        total_bd = 0.0
+        for row in range(self.table.rowCount() - 1):
+            dlugosc_item = self.table.item(row, 0)
+            bd_item = self.table.item(row, 2)
+            try:
+                total_length += float(dlugosc_item.text())
+                if bd_item is not None and bd_item.text():
+                    total_bd += float(bd_item.text())
+            except (AttributeError, ValueError):
+                continue
+        self.result_label.setText(
+            f"Łączna Długość: {total_length:.2f} mm\nŁączny Ubytek (BD): {total_bd:.2f} mm"
+        )
+
     def calculate_total_bd(self):
+        with stats.timer("bd.calculate_total"):
+            self._calculate_total_bd()
+
+    def _calculate_total_bd(self):
         try:
             material = self.material_input.currentText()
-            total_length = 0.0
-            total_bd = 0.0
+            rows, lengths, angles = [], [], []
             for row in range(self.table.rowCount() - 1):
                 dlugosc_item = self.table.item(row, 0)
                 kat_item = self.table.item(row, 1)
                 if not dlugosc_item or not kat_item:
                     continue
-                dlugosc = float(dlugosc_item.text())
-                kat = float(kat_item.text())
-                grubosc = float(self.grubosc_input.currentText())
-                V = float(self.V_input.currentText())
-                bd_value = 0.0 if kat == 0 else self.model.oblicz_bd(grubosc, V, kat, material)
-                total_length += dlugosc
-                total_bd += bd_value
+                rows.append(row)
+                lengths.append(float(dlugosc_item.text()))
+                angles.append(float(kat_item.text()))
+            grubosc = float(self.grubosc_input.currentText())
+            V = float(self.V_input.currentText())
+            part = os.path.basename(self.current_dxf_path) if self.current_dxf_path else None
+            result = calculate_part(self.model, grubosc, V, material, lengths, angles, part=part, source="gui",
+                                    cache=self.prediction_cache)
+            for row, bd_value in zip(rows, result["bd"]):
                 bd_item = QTableWidgetItem(f"{bd_value:.2f}")
                 bd_item.setFlags(Qt.ItemIsEnabled)
                 self.table.setItem(row, 2, bd_item)
             self.result_label.setText(
-                f"Łączna Długość: {total_length:.2f} mm\nŁączny Ubytek (BD): {total_bd:.2f} mm"
+                f"Łączna Długość: {result['total_length']:.2f} mm\n"
+                f"Łączny Ubytek (BD): {result['total_bd']:.2f} mm"
             )
+            self.record_part_usage(grubosc, V, material)
         except Exception as e:
             QMessageBox.warning(self, "Błąd", f"Wystąpił błąd podczas obliczania BD:\n{e}")
 
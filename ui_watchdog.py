@@ -0,0 +1,211 @@
+"""Watchdog pętli zdarzeń Qt i pomiar czasu slotów.
+
+Watchdog co `interval_ms` wysyła impuls QTimer i mierzy jego opóźnienie (lag pętli
+zdarzeń). Wątek w tle sprawdza, czy impulsy docierają – jeżeli wątek GUI nie odpowiada
+dłużej niż próg, zapisuje zrzut stosu wątku GUI. Przestoje powyżej progu są zapisywane
+jako linie JSON do rotowanego pliku raportu.
+
+Użycie:
+    watchdog = install_watchdog()
+    instrument_class(MainWindow)  # Metody *Event oraz MainWindow.TIMED_SLOTS
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from PyQt5.QtCore import QObject, QTimer
+
+from instrumentation import stats
+
+logger = logging.getLogger(__name__)
+
+STALL_THRESHOLD_MS = float(os.getenv("LMDB_STALL_MS", "200"))
+HEARTBEAT_INTERVAL_MS = 50
+REPORT_FILE = os.path.join("reports", "ui_stalls.jsonl")
+REPORT_MAX_BYTES = 1024 * 1024
+REPORT_BACKUP_COUNT = 5
+MAX_STACK_DEPTH = 40
+
+_active_watchdog = None
+
+
+def get_watchdog():
+    """Zwraca zainstalowany watchdog lub None."""
+    return _active_watchdog
+
+
+def install_watchdog(threshold_ms=STALL_THRESHOLD_MS, report_file=REPORT_FILE):
+    """Tworzy i uruchamia globalny watchdog (wymaga istniejącej QApplication)."""
+    global _active_watchdog
+    if _active_watchdog is None:
+        _active_watchdog = UiWatchdog(threshold_ms=threshold_ms, report_file=report_file)
+        _active_watchdog.start()
+    return _active_watchdog
+
+
+def instrument_class(cls, extra_slots=()):
+    """Opakowuje sloty klasy pomiarem czasu; bez aktywnego watchdoga nic nie robi."""
+    if _active_watchdog is not None:
+        _active_watchdog.instrument_class(cls, extra_slots)
+    return cls
+
+
+def slot_names(cls):
+    """Metody do pomiaru: obsługa zdarzeń (*Event) i sloty wymienione w TIMED_SLOTS klasy."""
+    names = {attr for attr in vars(cls) if attr.endswith("Event")}
+    names.update(getattr(cls, "TIMED_SLOTS", ()))
+    return names
+
+
+def _stall_logger(report_file):
+    """Osobny logger zapisujący raporty przestojów do rotowanego pliku."""
+    stall_logger = logging.getLogger("lmdb.ui_stalls")
+    stall_logger.propagate = False
+    stall_logger.setLevel(logging.INFO)
+    if not stall_logger.handlers:
+        os.makedirs(os.path.dirname(report_file) or ".", exist_ok=True)
+        handler = RotatingFileHandler(report_file, maxBytes=REPORT_MAX_BYTES,
+                                      backupCount=REPORT_BACKUP_COUNT, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        stall_logger.addHandler(handler)
+    return stall_logger
+
+
+def _positional_limit(func):
+    """Maksymalna liczba argumentów pozycyjnych funkcji (None – bez ograniczenia)."""
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    if any(p.kind == p.VAR_POSITIONAL for p in params):
+        return None
+    return sum(1 for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD))
+
+
+class UiWatchdog(QObject):
+    """Mierzy lag pętli zdarzeń i czas slotów, raportuje przestoje ze zrzutem stosu."""
+
+    def __init__(self, threshold_ms=STALL_THRESHOLD_MS, interval_ms=HEARTBEAT_INTERVAL_MS,
+                 report_file=REPORT_FILE, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.report_file = report_file
+        self.report_logger = _stall_logger(report_file)
+        self.main_thread_id = threading.get_ident()
+        self.current_slots = []  # Stos aktualnie wykonywanych slotów (wątek GUI)
+        self._last_tick = time.monotonic()
+        self._stall_snapshot = None  # (nazwa slotu, stos) zebrany przez wątek w tle
+        self._slot_reported = False
+        self._stop = threading.Event()
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._on_heartbeat)
+        self._thread = threading.Thread(target=self._monitor, name="ui-watchdog", daemon=True)
+        self._instrumented = set()
+
+    def start(self):
+        self._last_tick = time.monotonic()
+        self._timer.start()
+        self._thread.start()
+        logger.info("Watchdog GUI uruchomiony (próg %.0f ms, raport %s)", self.threshold * 1000, self.report_file)
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+
+    def _on_heartbeat(self):
+        now = time.monotonic()
+        lag = max(now - self._last_tick - self.interval, 0.0)
+        self._last_tick = now
+        stats.observe("ui.event_loop_lag_ms", lag * 1000.0)
+        snapshot, self._stall_snapshot = self._stall_snapshot, None
+        if lag >= self.threshold and not self._slot_reported:
+            slot, stack = snapshot if snapshot else (None, None)
+            self.report("event_loop", slot or "?", lag, stack)
+        self._slot_reported = False
+
+    def _monitor(self):
+        """Wątek w tle: zrzuca stos wątku GUI, gdy impuls nie dociera dłużej niż próg."""
+        while not self._stop.wait(self.threshold / 2):
+            if self._stall_snapshot is not None:
+                continue
+            if time.monotonic() - self._last_tick - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame, limit=MAX_STACK_DEPTH)
+            slot = self.current_slots[0] if self.current_slots else None
+            self._stall_snapshot = (slot, [line.rstrip() for line in stack])
+
+    def report(self, kind, name, duration, stack=None):
+        """Zapisuje przestój do rotowanego raportu i liczników."""
+        stats.incr("ui.stalls")
+        record = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "kind": kind,
+            "name": name,
+            "duration_ms": round(duration * 1000.0, 1),
+            "stack": stack or [],
+        }
+        self.report_logger.info(json.dumps(record, ensure_ascii=False))
+        logger.warning("Przestój GUI: %s %s trwał %.0f ms", kind, name, duration * 1000.0)
+
+    def timed_slot(self, name, func):
+        """Zwraca funkcję mierzącą czas wywołania `func`, zgodną z połączeniami sygnałów Qt."""
+        limit = _positional_limit(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if limit is not None:
+                # Sygnały Qt przekazują dodatkowe argumenty (np. checked) – obcinamy je
+                args = args[:limit]
+            if threading.get_ident() != self.main_thread_id:
+                return func(*args, **kwargs)
+            outermost = not self.current_slots
+            self.current_slots.append(name)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.current_slots.pop()
+                stats.record_time(f"slot.{name}", elapsed * 1000.0)
+                if outermost and elapsed >= self.threshold:
+                    snapshot = self._stall_snapshot
+                    stack = snapshot[1] if snapshot and snapshot[0] == name else None
+                    self.report("slot", name, elapsed, stack)
+                    self._slot_reported = True
+
+        wrapper._watchdog_timed = True
+        return wrapper
+
+    def instrument_class(self, cls, extra_slots=()):
+        """Opakowuje sloty i obsługę zdarzeń klasy pomiarem czasu.
+
+        Sloty wymienia jawnie atrybut TIMED_SLOTS klasy (także te podłączane w innych modułach);
+        metody pomocnicze wywoływane bezpośrednio (np. przy każdym ruchu myszy) nie są
+        opakowywane. extra_slots – dodatkowe nazwy metod do pomiaru.
+        """
+        if cls in self._instrumented:
+            return
+        self._instrumented.add(cls)
+        names = slot_names(cls) | set(extra_slots)
+        missing = sorted(name for name in names if name not in vars(cls))
+        if missing:
+            logger.warning("Klasa %s nie definiuje slotów do pomiaru: %s", cls.__name__, ", ".join(missing))
+        for attr, value in list(vars(cls).items()):
+            if attr not in names or attr.startswith("__") or not inspect.isfunction(value):
+                continue
+            if getattr(value, "_watchdog_timed", False):
+                continue
+            setattr(cls, attr, self.timed_slot(f"{cls.__name__}.{attr}", value))